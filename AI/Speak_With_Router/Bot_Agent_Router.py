@@ -1,12 +1,23 @@
 import os
 import json
 import re
-from netmiko import ConnectHandler
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from timing import span
+
+from ssh_pool import get_pool
+from cmd_cache import CommandCache
+from compact import compact_output, focus_terms
+from tg_stream import TelegramStream
+
 
 # -----------------------
 # ENV / Config
@@ -22,6 +33,27 @@ ROUTER = {
     "password": "cisco"    
 }
 
+# long-lived SSH sessions to the router instead of one login per command
+SSH_POOL = get_pool(
+    ROUTER,
+    max_sessions=int(os.environ.get("SSH_POOL_SIZE", "2")),
+    idle_timeout=float(os.environ.get("SSH_IDLE_TIMEOUT", "300")),
+)
+
+# recent show output, shared by all chats; concurrent identical commands share one round-trip
+CMD_CACHE = CommandCache(
+    ttl=float(os.environ.get("CMD_CACHE_TTL", "30")),
+    max_entries=int(os.environ.get("CMD_CACHE_SIZE", "256")),
+)
+
+# Netmiko is blocking, so device commands run here and never on the event loop
+DEVICE_EXECUTOR = ThreadPoolExecutor(max_workers=SSH_POOL.max_sessions, thread_name_prefix="device")
+
+# questions waiting per chat (besides the one being answered); when full the bot
+# says it is busy instead of piling up work
+CHAT_QUEUE_SIZE = int(os.environ.get("CHAT_QUEUE_SIZE", "3"))
+chat_queues = {}    # chat_id -> asyncio.Queue of (update, question)
+chat_pending = {}   # chat_id -> questions accepted and not answered yet
 
 
 ALLOWED_PATTERNS = [
@@ -55,20 +87,30 @@ def run_cli(command: str) -> str:
     if cmd.lower() == "show running-config":
         return "ERROR: Full running-config is not allowed. Use filtered commands like '| include' or '| section'."
 
+    def send():
+        with span("cli.send_command", host=ROUTER["host"], command=cmd):
+            return SSH_POOL.send_command(cmd, read_timeout=30)
+
     try:
-        conn = ConnectHandler(**ROUTER)
-        out = conn.send_command(cmd, read_timeout=30)
-        conn.disconnect()
+        if SHOW_ONLY.match(cmd):
+            # ping/traceroute are live measurements and always go to the router
+            out = CMD_CACHE.get_or_run(ROUTER["host"], cmd, send, cache_if=is_valid_output)
+        else:
+            out = send()
     except Exception as e:
         return f"ERROR: CLI execution failed: {e}"
 
     
-    if "% Invalid input" in out or "% Incomplete command" in out:
+    if not is_valid_output(out):
         return "ERROR: Invalid Cisco IOS command."
 
     return out
 
 
+def is_valid_output(out: str) -> bool:
+    return "% Invalid input" not in out and "% Incomplete command" not in out
+
+
 
 SHOW_ONLY = re.compile(r"^\s*show\s+", re.IGNORECASE)
 PING_OK   = re.compile(r"^\s*ping(\s+|$)", re.IGNORECASE)
@@ -77,7 +119,13 @@ TRACE_OK  = re.compile(r"^\s*traceroute(\s+|$)", re.IGNORECASE)
 MAX_TOOL_CALLS_PER_QUESTION = 3 # MVP
 MAX_ROUNDS = 4                  # go and back to AI
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# seconds between edits of a streamed answer (Telegram throttles faster edits)
+TG_EDIT_INTERVAL = float(os.environ.get("TG_EDIT_INTERVAL", "1.0"))
+
+# approx. tokens of CLI output per command sent back to the model
+TOOL_OUTPUT_BUDGET = int(os.environ.get("TOOL_OUTPUT_BUDGET", "800"))
+
+client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 
 def run_show(command: str) -> str:
@@ -88,40 +136,45 @@ def run_show(command: str) -> str:
     if not ROUTER["host"] or not ROUTER["username"]:
         return "ERROR: Router connection env vars are not set (ROUTER_HOST/USER/PASS)."
 
-    conn = ConnectHandler(**ROUTER)
-    try:
-        out = conn.send_command(command, read_timeout=30)
-    finally:
-        conn.disconnect()
-    return out
+    with span("cli.send_command", host=ROUTER["host"], command=command):
+        return SSH_POOL.send_command(command, read_timeout=30)
 
 
-FUNCTIONS = [
+TOOLS = [
     {
-        "name": "run_show",
-        "description": f"Run a read-only Cisco IOS SHOW command on device {ROUTER_NAME}",
-        "parameters": {
-            "type": "object",
-            "properties": {"command": {"type": "string"}},
-            "required": ["command"]
+        "type": "function",
+        "function": {
+            "name": "run_show",
+            "description": f"Run a read-only Cisco IOS SHOW command on device {ROUTER_NAME}",
+            "parameters": {
+                "type": "object",
+                "properties": {"command": {"type": "string"}},
+                "required": ["command"]
+            }
         }
     },
     {
-        "name": "run_ping",
-        "description": f"Run a ping command on device {ROUTER_NAME} to test reachability.",
-        "parameters": {
-            "type": "object",
-            "properties": {"command": {"type": "string", "description": "A Cisco IOS ping command, e.g. ping 8.8.8.8"}},
-            "required": ["command"]
+        "type": "function",
+        "function": {
+            "name": "run_ping",
+            "description": f"Run a ping command on device {ROUTER_NAME} to test reachability.",
+            "parameters": {
+                "type": "object",
+                "properties": {"command": {"type": "string", "description": "A Cisco IOS ping command, e.g. ping 8.8.8.8"}},
+                "required": ["command"]
+            }
         }
     },
     {
-        "name": "run_traceroute",
-        "description": f"Run a traceroute command on device {ROUTER_NAME}.",
-        "parameters": {
-            "type": "object",
-            "properties": {"command": {"type": "string", "description": "A Cisco IOS traceroute command"}},
-            "required": ["command"]
+        "type": "function",
+        "function": {
+            "name": "run_traceroute",
+            "description": f"Run a traceroute command on device {ROUTER_NAME}.",
+            "parameters": {
+                "type": "object",
+                "properties": {"command": {"type": "string", "description": "A Cisco IOS traceroute command"}},
+                "required": ["command"]
+            }
         }
     }
 ]
@@ -140,6 +193,7 @@ Allowed actions ONLY via tool calls:
 Strict rules:
 - NEVER request config mode commands (conf t, configure terminal, write, reload, clear, debug, copy, etc.).
 - Use at most 3 tool calls per user question.
+- Request all the commands you need at once: independent tool calls in the same step run in parallel.
 - Prefer filtered/short outputs (include/section/| last) instead of huge outputs.
 - If the question cannot be answered reliably with allowed commands, state that clearly and propose the best next command(s) you would run.
 
@@ -162,50 +216,108 @@ Valid examples:
 
 
 
-def agent_answer(question: str) -> str:
+async def run_tool_calls(tool_calls, focus):
+    """Run the requested commands concurrently on the device and compact their output."""
+    cmds = [(json.loads(tc["function"]["arguments"] or "{}").get("command") or "").strip() for tc in tool_calls]
+    loop = asyncio.get_running_loop()
+    outputs = await asyncio.gather(*(loop.run_in_executor(DEVICE_EXECUTOR, run_cli, cmd) for cmd in cmds))
+    return [
+        {
+            "role": "tool",
+            "tool_call_id": tc["id"],
+            "content": f"COMMAND: {cmd}\n\nOUTPUT:\n{compact_output(cmd, out, TOOL_OUTPUT_BUDGET, focus)}",
+        }
+        for tc, cmd, out in zip(tool_calls, cmds, outputs)
+    ]
+
+
+async def stream_round(messages, tool_choice, on_text, on_reset=None):
+    """
+    One streamed completion. Text is passed to on_text as it arrives, until
+    the round turns out to call tools: then on_reset takes back what was
+    sent (a "Let me check..." preamble is not the answer).
+    Tool calls come in pieces and are put back together here.
+    Returns (text, tool_calls).
+    """
+    text = []
+    calls = {}   # index -> {"id", "type", "function": {"name", "arguments"}}
+    forwarded = False
+    with span("llm.chat"):
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            tools=TOOLS,
+            tool_choice=tool_choice,
+            parallel_tool_calls=True,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                text.append(delta.content)
+                if on_text and not calls:
+                    await on_text(delta.content)
+                    forwarded = True
+            if delta.tool_calls and forwarded:
+                forwarded = False
+                if on_reset:
+                    await on_reset()
+            for tc in delta.tool_calls or []:
+                call = calls.setdefault(tc.index, {"id": None, "type": "function",
+                                                   "function": {"name": "", "arguments": ""}})
+                if tc.id:
+                    call["id"] = tc.id
+                if tc.function and tc.function.name:
+                    call["function"]["name"] += tc.function.name
+                if tc.function and tc.function.arguments:
+                    call["function"]["arguments"] += tc.function.arguments
+    return "".join(text), [calls[i] for i in sorted(calls)]
+
+
+async def agent_answer(question: str, on_text=None, on_reset=None) -> str:
+    """
+    Answer a question; if on_text is given, the final answer is streamed to it
+    as it is written (on_reset is called when streamed text was not the answer).
+    """
     messages = [
         {"role": "system", "content": SYSTEM_INSTRUCTIONS},
         {"role": "user", "content": question},
     ]
 
+    # interfaces / addresses named in the question, used to trim table output
+    focus = focus_terms(question)
     tool_calls_used = 0
 
     for _ in range(MAX_ROUNDS):
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            functions=FUNCTIONS,
-            function_call="auto",
-        )
-
-        msg = response.choices[0].message
+        # out of diagnostic steps: make the model answer with what it has
+        budget_left = MAX_TOOL_CALLS_PER_QUESTION - tool_calls_used
+        content, tool_calls = await stream_round(messages, "auto" if budget_left > 0 else "none",
+                                                  on_text, on_reset)
 
-        # Tool requested?
-        if msg.function_call:
-            tool_calls_used += 1
-            if tool_calls_used > MAX_TOOL_CALLS_PER_QUESTION:
-                return "I hit the max diagnostic steps for one question. Please ask more specifically (interface/protocol/target)."
+        # Tools requested?
+        if tool_calls:
+            # append assistant tool call message
+            messages.append({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
 
-            fn = msg.function_call.name
-            args = json.loads(msg.function_call.arguments or "{}")
-            cmd = (args.get("command") or "").strip()
+            allowed = tool_calls[:budget_left]
+            tool_calls_used += len(allowed)
 
-            # real run
-            result = run_cli(cmd)
+            # real run, all commands of this round at once
+            messages.extend(await run_tool_calls(allowed, focus))
 
-            # append assistant tool call message
-            messages.append(msg)
-
-            # append function output
-            messages.append({
-                "role": "function",
-                "name": fn,
-                "content": f"COMMAND: {cmd}\n\nOUTPUT:\n{result}"
-            })
+            # every tool call needs an answer, even the ones over the limit
+            for tc in tool_calls[len(allowed):]:
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tc["id"],
+                    "content": "ERROR: Tool call limit reached for this question. Answer with the outputs you have.",
+                })
             continue
 
         # Final answer
-        return (msg.content or "").strip() or "(No answer text returned.)"
+        return content.strip() or "(No answer text returned.)"
 
     return "I couldn't complete within allowed steps. Please ask a narrower question."
 
@@ -223,23 +335,66 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"- Any routing issues?\n"
     )
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    q = (update.message.text or "").strip()
-    if not q:
-        return
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    c = CMD_CACHE.snapshot()
+    p = SSH_POOL.stats
+    await update.message.reply_text(
+        f"Command cache: {c['hits']} hits, {c['shared']} shared, {c['misses']} misses "
+        f"(hit ratio {c['hit_ratio']:.0%})\n"
+        f"Entries: {c['entries']}/{CMD_CACHE.max_entries}, TTL {CMD_CACHE.ttl:g}s, "
+        f"expired {c['expired']}, evicted {c['evictions']}\n"
+        f"SSH pool: {p['connects']} connects, {p['reuses']} reuses, {p['reconnects']} reconnects"
+    )
 
-    await update.message.reply_text("Checking the router and analyzing...")
+async def answer_question(update: Update, q: str):
+    placeholder = await update.message.reply_text("Checking the router and analyzing...")
+    # the answer appears in the placeholder as it is written, long answers continue in new messages
+    stream = TelegramStream(placeholder, min_interval=TG_EDIT_INTERVAL)
 
     try:
-        answer = agent_answer(q)
+        answer = await agent_answer(q, on_text=stream.feed, on_reset=stream.reset)
     except Exception as e:
+        # shown after whatever part of the answer was streamed
         answer = f"Error: {e}"
 
-    #limit of telegram massage
-    if len(answer) > 3800:
-        answer = answer[:3800] + "\n\n(Trimmed. Ask a more specific question.)"
+    await stream.finish(answer)
+
 
-    await update.message.reply_text(answer)
+async def chat_worker(chat_id, queue: asyncio.Queue):
+    # one worker per chat answers its questions in order, then goes away
+    try:
+        while not queue.empty():
+            update, q = queue.get_nowait()
+            try:
+                await answer_question(update, q)
+            finally:
+                chat_pending[chat_id] -= 1
+    finally:
+        chat_queues.pop(chat_id, None)
+        chat_pending.pop(chat_id, None)
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    q = (update.message.text or "").strip()
+    if not q:
+        return
+
+    chat_id = update.effective_chat.id
+    ahead = chat_pending.get(chat_id, 0)
+    if ahead > CHAT_QUEUE_SIZE:
+        await update.message.reply_text(
+            f"Busy: {ahead - 1} questions from this chat are already waiting. Please try again shortly."
+        )
+        return
+
+    queue = chat_queues.get(chat_id)
+    if queue is None:
+        queue = chat_queues[chat_id] = asyncio.Queue()
+        context.application.create_task(chat_worker(chat_id, queue), update=update)
+    chat_pending[chat_id] = ahead + 1
+    queue.put_nowait((update, q))
+    if ahead:
+        await update.message.reply_text(f"Queued behind {ahead} question(s) from this chat...")
 
 
 def main():
@@ -250,10 +405,15 @@ def main():
 
     app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("stats", stats))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     print("Telegram Router Agent running...")
-    app.run_polling()
+    try:
+        app.run_polling()
+    finally:
+        DEVICE_EXECUTOR.shutdown(wait=False)
+        SSH_POOL.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# whole-word IOS abbreviations seen from operators and the LLM; anything else is kept as typed
+ABBREVIATIONS = {
+    "sh": "show", "sho": "show",
+    "int": "interface", "inter": "interface", "interf": "interface", "interfaces": "interface",
+    "br": "brief", "bri": "brief",
+    "run": "running-config", "running": "running-config",
+    "ro": "route", "rou": "route",
+    "inc": "include", "incl": "include", "i": "include",
+    "sec": "section", "s": "section",
+    "log": "logging",
+}
+
+
+def normalize_command(command: str) -> str:
+    """
+    'sh  ip int br' and 'show ip interface brief' give the same key.
+    Only the command words are lowercased; the pattern after '| include'
+    is case-sensitive on IOS and is kept as is.
+    """
+    # IOS takes one filter: everything after the first pipe is "<filter> <regex>"
+    head, pipe, tail = command.partition("|")
+    key = " ".join(ABBREVIATIONS.get(w, w) for w in head.lower().split())
+    if pipe:
+        word, _, pattern = tail.strip().partition(" ")
+        word = ABBREVIATIONS.get(word.lower(), word.lower())
+        key += f" | {word} {pattern.strip()}".rstrip()
+    return key
+
+
+class CommandCache:
+    """
+    TTL + LRU cache of command output, per router.
+
+    - entries live for ttl seconds; at most max_entries are kept, least recently
+      used first out
+    - concurrent calls for the same router and command share one device
+      round-trip (single-flight): the first caller runs it, the others wait for
+      its result
+    - only results accepted by cache_if are stored (errors are not)
+
+    Arguments:
+        ttl: seconds an output stays fresh, 0 disables caching (single-flight still applies)
+        max_entries: LRU size limit
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # (router, command) -> (expires_at, output)
+        self._inflight = {}          # (router, command) -> Future
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "expired": 0, "evictions": 0}
+
+    def get_or_run(self, router: str, command: str, fn, cache_if=lambda out: True):
+        key = (router, normalize_command(command))
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._data[key]
+                self.stats["expired"] += 1
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            output = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if self.ttl > 0 and cache_if(output):
+                self._data[key] = (time.monotonic() + self.ttl, output)
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+                    self.stats["evictions"] += 1
+        future.set_result(output)
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._data))
+        lookups = stats["hits"] + stats["misses"] + stats["shared"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["shared"]) / lookups, 3) if lookups else 0.0
+        return stats
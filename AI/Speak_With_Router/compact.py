@@ -0,0 +1,165 @@
+import ipaddress
+import re
+
+from cmd_cache import normalize_command
+
+# rough size of a model token; good enough to keep prompts inside a budget
+CHARS_PER_TOKEN = 4
+
+INTERFACE_PREFIXES = {
+    "gi": "GigabitEthernet",
+    "fa": "FastEthernet",
+    "te": "TenGigabitEthernet",
+    "tw": "TwoGigabitEthernet",
+    "eth": "Ethernet",
+    "et": "Ethernet",
+    "lo": "Loopback",
+    "vl": "Vlan",
+    "po": "Port-channel",
+    "tu": "Tunnel",
+    "se": "Serial",
+}
+
+INTERFACE_RE = re.compile(
+    r"\b(GigabitEthernet|FastEthernet|TenGigabitEthernet|TwoGigabitEthernet|Ethernet|Loopback|Vlan|"
+    r"Port-channel|Tunnel|Serial|Gig?|Fa|Te|Tw|Eth?|Lo|Vl|Po|Tu|Se)\s?(\d+(?:/\d+)*(?:\.\d+)?)\b",
+    re.IGNORECASE,
+)
+IPV4_RE = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})(/\d{1,2})?\b")
+
+ROUTE_TABLE = re.compile(r"^show ip route\b", re.IGNORECASE)
+# commands are matched after normalize_command(): "sh ip ro" -> "show ip route"
+# only the one-line-per-route table forms are filtered: plain, per vrf, per protocol;
+# "show ip route 10.1.1.5" and friends print a detail block that must stay whole
+ROUTE_LIST = re.compile(
+    r"^show ip route(?: vrf \S+)?(?: (?:connected|static|ospf|bgp|eigrp|rip|isis|odr|local)(?: \d+)?)?\s*$",
+    re.IGNORECASE,
+)
+# second ECMP path, or the next hop of a prefix too long for its row
+ROUTE_CONTINUATION = re.compile(r"^\s+(?:\[\d+/\d+\]|via )")
+INTERFACE_TABLE = re.compile(r"^show (ip )?int\w* (brief|status|description)\b", re.IGNORECASE)
+
+
+def normalize_interface(kind: str, number: str) -> str:
+    kind = kind.lower()
+    for prefix, full in INTERFACE_PREFIXES.items():
+        if full.lower() == kind or kind.startswith(prefix):
+            return f"{full}{number}"
+    return f"{kind}{number}"
+
+
+def focus_terms(text: str) -> dict:
+    """Interfaces and IPv4 addresses mentioned in the question, e.g. 'why is Gi0/1 down?'."""
+    interfaces = {normalize_interface(k, n) for k, n in INTERFACE_RE.findall(text or "")}
+    addresses = set()
+    for ip, _ in IPV4_RE.findall(text or ""):
+        try:
+            addresses.add(ipaddress.ip_address(ip))
+        except ValueError:
+            pass
+    return {"interfaces": interfaces, "addresses": addresses}
+
+
+def _drop_noise(lines):
+    """Blank lines and rows repeating the row above them."""
+    out, previous = [], None
+    for line in lines:
+        line = line.rstrip()
+        if not line.strip() or line == previous:
+            continue
+        out.append(line)
+        previous = line
+    return out
+
+
+def _drop_route_legend(lines):
+    """The 'Codes: ...' block at the top of show ip route is the same on every router."""
+    out, in_legend = [], False
+    for line in lines:
+        if line.startswith("Codes:"):
+            in_legend = True
+            continue
+        if in_legend and (line.startswith(" ") or line.startswith("\t")):
+            continue
+        in_legend = False
+        out.append(line)
+    return out
+
+
+def _route_matches(line, addresses):
+    for net, plen in IPV4_RE.findall(line):
+        try:
+            network = ipaddress.ip_network(net + (plen or ""), strict=False)
+        except ValueError:
+            continue
+        if plen and any(a in network for a in addresses):
+            return True
+        if not plen and any(a == network.network_address for a in addresses):
+            return True
+    return False
+
+
+def _route_blocks(lines):
+    """Route rows with their continuation lines attached."""
+    blocks = []
+    for line in lines:
+        if blocks and ROUTE_CONTINUATION.match(line):
+            blocks[-1].append(line)
+        else:
+            blocks.append([line])
+    return blocks
+
+
+def _keep_matching_rows(command, lines, focus):
+    """For table output, keep only the rows about what the question is about."""
+    interfaces, addresses = focus["interfaces"], focus["addresses"]
+    if INTERFACE_TABLE.match(command) and interfaces:
+        rows = [l for l in lines[1:]
+                if (m := INTERFACE_RE.match(l)) and normalize_interface(*m.groups()) in interfaces]
+        return lines[:1] + rows if rows else lines
+    if ROUTE_LIST.match(command) and addresses:
+        header = [l for l in lines if l.startswith("Gateway of last resort")]
+        rows = [l for block in _route_blocks(lines)
+                if any(_route_matches(l, addresses) for l in block) for l in block]
+        return header + rows if rows else lines
+    return lines
+
+
+def truncate_middle(lines, max_chars):
+    """Keep the head and the tail of long output, drop the middle."""
+    if sum(len(l) + 1 for l in lines) <= max_chars:
+        return lines
+    head_budget, tail_budget = int(max_chars * 0.6), int(max_chars * 0.4)
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_budget:
+            break
+        head.append(line)
+        used += len(line) + 1
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > tail_budget:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+    omitted = len(lines) - len(head) - len(tail)
+    return head + [f"... ({omitted} lines omitted) ..."] + tail
+
+
+def compact_output(command: str, output: str, budget: int = 800, focus: dict = None) -> str:
+    """
+    Shrink CLI output before it goes back to the model:
+    drop blank and repeated rows, the route legend, rows about other
+    interfaces/prefixes than the question names, then head/tail truncate to
+    about `budget` tokens.
+    """
+    if output.startswith("ERROR:"):
+        return output
+    command = normalize_command(command)   # "sh ip int br", "sh ip ro" are matched like the full forms
+    lines = _drop_noise(output.splitlines())
+    if ROUTE_TABLE.match(command):
+        lines = _drop_route_legend(lines)
+    if focus:
+        lines = _keep_matching_rows(command, lines, focus)
+    return "\n".join(truncate_middle(lines, budget * CHARS_PER_TOKEN))
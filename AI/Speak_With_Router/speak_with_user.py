@@ -1,12 +1,17 @@
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
 
+from tg_stream import TelegramStream
+
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# seconds between edits of a streamed answer (Telegram throttles faster edits)
+TG_EDIT_INTERVAL = float(os.environ.get("TG_EDIT_INTERVAL", "1.0"))
+
+client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("AI Bot is ready 🤖 Ask me anything.")
@@ -14,23 +19,27 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_text = update.message.text
 
-    await update.message.reply_text("Thinking...")
+    placeholder = await update.message.reply_text("Thinking...")
+    # edit the placeholder as the answer streams in; long answers continue in new messages
+    stream = TelegramStream(placeholder, min_interval=TG_EDIT_INTERVAL)
 
+    answer = None
     try:
-        response = client.responses.create(
+        response = await client.responses.create(
             model="gpt-5-mini",
-            input=user_text
+            input=user_text,
+            stream=True,
         )
-
-        answer = response.output_text
+        async for event in response:
+            if event.type == "response.output_text.delta":
+                await stream.feed(event.delta)
     except Exception as e:
+        # shown after whatever part of the answer was streamed
         answer = f"Error: {e}"
+    if answer is None and not stream.received:
+        answer = "(No answer text returned.)"
 
-    # Telegram limit ~4096 chars
-    if len(answer) > 3800:
-        answer = answer[:3800] + "\n\n(Trimmed)"
-
-    await update.message.reply_text(answer)
+    await stream.finish(answer)
 
 def main():
     if not TELEGRAM_BOT_TOKEN:
@@ -38,7 +47,8 @@ def main():
     if not OPENAI_API_KEY:
         raise SystemExit("Set OPENAI_API_KEY first.")
 
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # answers are streamed for several seconds; don't make other users wait for them
+    app = Application.builder().token(TELEGRAM_BOT_TOKEN).concurrent_updates(True).build()
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -0,0 +1,157 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from netmiko import ConnectHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from timing import span
+
+# errors that mean the SSH channel itself is gone, so a fresh session may succeed
+CHANNEL_ERRORS = (OSError, EOFError)
+
+
+class SSHPool:
+    """
+    Long-lived Netmiko sessions to one router.
+
+    - at most max_sessions SSH sessions are open; callers beyond that wait
+    - a session is used by one caller at a time, so commands never interleave
+      on a channel
+    - a session idle for more than health_check_after seconds is probed with
+      is_alive() before reuse, and reconnected if the probe fails
+    - sessions idle for more than idle_timeout seconds are closed in the background
+    - a command that fails because the channel dropped is retried once on a new session
+
+    Arguments:
+        device: Netmiko ConnectHandler arguments
+        max_sessions: SSH sessions kept to the router (vty lines are scarce)
+        idle_timeout: seconds before an unused session is closed
+        health_check_after: idle seconds after which a session is probed before use
+    """
+
+    def __init__(self, device: dict, max_sessions: int = 2, idle_timeout: float = 300,
+                 health_check_after: float = 30):
+        self.device = dict(device)
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self._idle = []          # [(conn, last_used)], most recently used last
+        self._closed = threading.Event()
+        self.stats = {"connects": 0, "reuses": 0, "reconnects": 0, "idle_closed": 0}
+
+        threading.Thread(target=self._reaper, daemon=True).start()
+
+    # ---------- sessions ----------
+
+    def _connect(self):
+        with span("ssh.connect", host=self.device.get("host")):
+            conn = ConnectHandler(**self.device)
+        self.stats["connects"] += 1
+        return conn
+
+    @staticmethod
+    def _disconnect(conn):
+        try:
+            conn.disconnect()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _alive(conn) -> bool:
+        try:
+            return conn.is_alive()
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                conn, last_used = self._idle.pop() if self._idle else (None, None)
+            if conn is None:
+                return self._connect()
+
+            idle = time.monotonic() - last_used
+            if idle > self.idle_timeout or (idle > self.health_check_after and not self._alive(conn)):
+                self._disconnect(conn)
+                self.stats["reconnects"] += 1
+                continue
+
+            self.stats["reuses"] += 1
+            return conn
+
+    def _checkin(self, conn):
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def session(self):
+        """Borrow a session for exclusive use: `with pool.session() as conn: ...`."""
+        if self._closed.is_set():
+            raise RuntimeError("SSH pool is closed")
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except Exception:
+                # whatever state the channel is in now, do not hand it to the next caller
+                self._disconnect(conn)
+                raise
+            else:
+                self._checkin(conn)
+
+    def send_command(self, command: str, **kwargs) -> str:
+        for attempt in (1, 2):
+            try:
+                with self.session() as conn:
+                    return conn.send_command(command, **kwargs)
+            except CHANNEL_ERRORS:
+                if attempt == 2:
+                    raise
+                self.stats["reconnects"] += 1
+
+    # ---------- housekeeping ----------
+
+    def _reaper(self):
+        while not self._closed.wait(min(self.idle_timeout, 30)):
+            now = time.monotonic()
+            with self._lock:
+                expired = [c for c, t in self._idle if now - t > self.idle_timeout]
+                self._idle = [(c, t) for c, t in self._idle if now - t <= self.idle_timeout]
+            for conn in expired:
+                self._disconnect(conn)
+                self.stats["idle_closed"] += 1
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._disconnect(conn)
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(device: dict, **options) -> SSHPool:
+    """One shared pool per router (host, port, username)."""
+    key = (device.get("host"), device.get("port", 22), device.get("username"))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = SSHPool(device, **options)
+        return pool
+
+
+def close_all():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
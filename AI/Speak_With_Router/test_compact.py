@@ -0,0 +1,63 @@
+"""
+Output compaction for full and abbreviated show commands. Runs under pytest
+or on its own:
+
+    python test_compact.py
+"""
+
+from compact import compact_output, focus_terms
+
+ROUTES = """Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP
+       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area
+
+Gateway of last resort is 192.168.12.2 to network 0.0.0.0
+
+      10.0.0.0/8 is variably subnetted, 3 subnets, 2 masks
+O        10.1.1.0/24 [110/2] via 192.168.12.2, 00:00:10, GigabitEthernet0/1
+                     [110/2] via 192.168.13.3, 00:00:10, GigabitEthernet0/2
+O        10.2.2.0/24 [110/2] via 192.168.12.2, 00:00:10, GigabitEthernet0/1
+C        192.168.12.0/24 is directly connected, GigabitEthernet0/1
+"""
+
+INTERFACES = """Interface              IP-Address      OK? Method Status                Protocol
+GigabitEthernet0/0     192.168.12.1    YES manual up                    up
+GigabitEthernet0/1     unassigned      YES unset  administratively down down
+GigabitEthernet0/2     192.168.13.1    YES manual up                    up
+"""
+
+DETAIL = """Routing entry for 10.1.1.0/24
+  Known via "ospf 1", distance 110, metric 2, type intra area
+  Routing Descriptor Blocks:
+  * 192.168.12.2, from 2.2.2.2, 00:00:10 ago, via GigabitEthernet0/1
+"""
+
+
+def test_route_table_full_and_abbreviated():
+    focus = focus_terms("how is 10.1.1.5 reached?")
+    for command in ("show ip route", "sh ip ro", "sh ip route"):
+        out = compact_output(command, ROUTES, focus=focus)
+        assert "Codes:" not in out, command
+        assert "10.2.2.0/24" not in out, command
+        # the second ECMP path stays with its route
+        assert "[110/2] via 192.168.13.3" in out, command
+
+
+def test_interface_table_full_and_abbreviated():
+    focus = focus_terms("why is Gi0/1 down?")
+    for command in ("show ip interface brief", "sh ip int br", "SH IP INT BRI"):
+        out = compact_output(command, INTERFACES, focus=focus).splitlines()
+        assert out[0].startswith("Interface"), command
+        assert [line.split()[0] for line in out[1:]] == ["GigabitEthernet0/1"], command
+
+
+def test_route_detail_is_not_filtered():
+    focus = focus_terms("how is 10.1.1.5 reached?")
+    for command in ("show ip route 10.1.1.5", "sh ip ro 10.1.1.5"):
+        assert compact_output(command, DETAIL, focus=focus) == DETAIL.rstrip("\n"), command
+
+
+if __name__ == "__main__":
+    test_route_table_full_and_abbreviated()
+    test_interface_table_full_and_abbreviated()
+    test_route_detail_is_not_filtered()
+    print("ok")
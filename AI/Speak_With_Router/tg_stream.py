@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+# Telegram rejects messages over 4096 characters; keep some headroom
+MESSAGE_LIMIT = 4000
+
+
+def split_point(text: str, limit: int) -> int:
+    """Where to cut text that is too long for one message: a newline, else a space, else hard."""
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    return cut if cut > 0 else limit
+
+
+class TelegramStream:
+    """
+    Shows an answer while it is still being generated by editing one Telegram
+    message as text arrives.
+
+    - edits are rate limited to one per min_interval seconds (Telegram throttles
+      bots that edit faster, roughly once a second per chat)
+    - text that outgrows one message continues in a new message
+    - reset() takes back what was streamed (text that turned out not to be the answer)
+    - finish() always shows the complete text, waiting out a RetryAfter if needed
+
+        placeholder = await update.message.reply_text("Thinking...")
+        stream = TelegramStream(placeholder)
+        async for delta in ...:
+            await stream.feed(delta)
+        await stream.finish()
+    """
+
+    def __init__(self, message, min_interval: float = 1.0, limit: int = MESSAGE_LIMIT):
+        self.message = message      # message currently being edited
+        self.min_interval = min_interval
+        self.limit = limit
+        self.current = ""           # full text meant for self.message
+        self.shown = message.text   # what Telegram shows in self.message right now
+        self.placeholder = message.text
+        self.next_edit = 0.0
+        self.received = 0
+        self.streamed = ""          # everything fed since the last reset
+
+    async def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        self.current += delta
+        self.streamed += delta
+        self.received += len(delta)
+        await self._flush(force=False)
+
+    async def reset(self) -> None:
+        self.current = ""
+        self.streamed = ""
+        self.received = 0
+        if time.monotonic() >= self.next_edit:
+            await self._edit(self.placeholder, force=False)
+
+    async def finish(self, text: str = None) -> None:
+        """
+        Show the final text. A text other than what was streamed (an error, a
+        fallback message) replaces an empty stream and is appended to a partial one.
+        """
+        if text is not None and text.strip() != self.streamed.strip():
+            self.current = f"{self.current.rstrip()}\n\n{text}" if self.received else text
+        if not self.current.strip():
+            self.current = self.placeholder
+        await self._flush(force=True)
+
+    async def _flush(self, force: bool) -> None:
+        while len(self.current) > self.limit:
+            cut = split_point(self.current, self.limit)
+            head, self.current = self.current[:cut], self.current[cut:].lstrip()
+            await self._edit(head, force=True)
+            self.message = await self.message.chat.send_message(self.current[:self.limit] or "...")
+            self.shown = self.message.text
+        if force or time.monotonic() >= self.next_edit:
+            await self._edit(self.current, force)
+
+    async def _edit(self, text: str, force: bool) -> None:
+        if not text.strip() or text == self.shown:
+            return
+        while True:
+            try:
+                await self.message.edit_text(text)
+                break
+            except RetryAfter as e:
+                delay = e.retry_after
+                if hasattr(delay, "total_seconds"):   # a timedelta in newer python-telegram-bot
+                    delay = delay.total_seconds()
+                if not force:
+                    self.next_edit = time.monotonic() + delay
+                    return
+                await asyncio.sleep(delay)
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    raise
+                break
+        self.shown = text
+        self.next_edit = time.monotonic() + self.min_interval
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Interface status/protocol history in one SQLite file.
+
+Every poll of `show ip interface brief` is recorded, but a sample row is only
+written when an interface changes state, so months of 5-minute polls stay
+small. Each row is one state change (a flap), which keeps flap queries to an
+index range scan:
+
+    device(id, name, last_poll)
+    interface(id, device_id, name, first_seen, last_seen, state_id)   current state
+    state(id, status, protocol)                                       interned pairs
+    sample(iface_id, ts, state_id)  WITHOUT ROWID, PK (iface_id, ts)  state changes
+
+CLI:
+
+    python if_history.py flaps --hours 24 --min 3
+    python if_history.py down --min 5
+    python if_history.py timeline R1 GigabitEthernet0/1 --hours 168
+    python if_history.py import R1_show_ip_int_brief_compact.json ...
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+HISTORY_DB = "if_history.sqlite"
+ADMIN_DOWN = "administratively down"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS device (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL UNIQUE,
+    last_poll INTEGER
+);
+CREATE TABLE IF NOT EXISTS state (
+    id       INTEGER PRIMARY KEY,
+    status   TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    UNIQUE (status, protocol)
+);
+CREATE TABLE IF NOT EXISTS interface (
+    id         INTEGER PRIMARY KEY,
+    device_id  INTEGER NOT NULL REFERENCES device(id),
+    name       TEXT NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen  INTEGER NOT NULL,
+    state_id   INTEGER NOT NULL REFERENCES state(id),
+    UNIQUE (device_id, name)
+);
+CREATE TABLE IF NOT EXISTS sample (
+    iface_id INTEGER NOT NULL,
+    ts       INTEGER NOT NULL,
+    state_id INTEGER NOT NULL,
+    PRIMARY KEY (iface_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sample_ts ON sample (ts);
+"""
+
+
+class InterfaceHistory:
+    def __init__(self, path: str = HISTORY_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._devices = dict(self.db.execute("SELECT name, id FROM device"))
+        self._states = {(s, p): i for i, s, p in self.db.execute("SELECT id, status, protocol FROM state")}
+
+    def close(self):
+        self.db.close()
+
+    # ---------- ids ----------
+
+    def _device_id(self, name):
+        if name not in self._devices:
+            cur = self.db.execute("INSERT INTO device (name) VALUES (?)", (name,))
+            self._devices[name] = cur.lastrowid
+        return self._devices[name]
+
+    def _state_id(self, status, protocol):
+        key = (status or "unknown", protocol or "unknown")
+        if key not in self._states:
+            cur = self.db.execute("INSERT INTO state (status, protocol) VALUES (?, ?)", key)
+            self._states[key] = cur.lastrowid
+        return self._states[key]
+
+    # ---------- write ----------
+
+    def record(self, device: str, rows, ts: int = None) -> int:
+        """
+        Record one poll of a device (the "interfaces" rows of summarize_int_brief).
+        Returns how many interfaces changed state since the previous poll.
+        """
+        ts = int(ts if ts is not None else time.time())
+        changes = 0
+        with self.db:
+            dev_id = self._device_id(device)
+            current = {
+                name: (iface_id, state_id)
+                for iface_id, name, state_id in self.db.execute(
+                    "SELECT id, name, state_id FROM interface WHERE device_id = ?", (dev_id,))
+            }
+            samples, seen = [], []
+            for row in rows:
+                state_id = self._state_id(row.get("status"), row.get("protocol"))
+                known = current.get(row["interface"])
+                if known is None:
+                    cur = self.db.execute(
+                        "INSERT INTO interface (device_id, name, first_seen, last_seen, state_id) "
+                        "VALUES (?, ?, ?, ?, ?)", (dev_id, row["interface"], ts, ts, state_id))
+                    samples.append((cur.lastrowid, ts, state_id))
+                    continue
+                iface_id, last_state = known
+                seen.append((ts, state_id, iface_id))
+                if state_id != last_state:
+                    samples.append((iface_id, ts, state_id))
+                    changes += 1
+            self.db.executemany("UPDATE interface SET last_seen = ?, state_id = ? WHERE id = ?", seen)
+            self.db.executemany("INSERT OR REPLACE INTO sample (iface_id, ts, state_id) VALUES (?, ?, ?)", samples)
+            self.db.execute("UPDATE device SET last_poll = ? WHERE id = ?", (ts, dev_id))
+        return changes
+
+    # ---------- queries ----------
+
+    def flaps(self, hours: float = 24, min_changes: int = 1, device: str = None, now: int = None):
+        """[(device, interface, changes)] with at least min_changes state changes in the last `hours`."""
+        since = int((now if now is not None else time.time()) - hours * 3600)
+        sql = """
+            SELECT d.name, i.name, COUNT(*) AS changes
+            FROM sample s
+            JOIN interface i ON i.id = s.iface_id
+            JOIN device d ON d.id = i.device_id
+            WHERE s.ts >= ? AND s.ts > i.first_seen {device}
+            GROUP BY s.iface_id
+            HAVING changes >= ?
+            ORDER BY changes DESC, d.name, i.name
+        """
+        if device:
+            return self.db.execute(sql.format(device="AND d.name = ?"), (since, device, min_changes)).fetchall()
+        return self.db.execute(sql.format(device=""), (since, min_changes)).fetchall()
+
+    def flap_counts(self, device: str, hours: float = 24) -> dict:
+        """{interface: changes in the last `hours`} for one device."""
+        return {iface: n for _, iface, n in self.flaps(hours=hours, device=device)}
+
+    def devices_with_down_ports(self, min_down: int = 5, include_admin_down: bool = False):
+        """[(device, down ports)] by the latest poll of each device."""
+        admin = "" if include_admin_down else "AND st.status != ?"
+        params = () if include_admin_down else (ADMIN_DOWN,)
+        return self.db.execute(f"""
+            SELECT d.name, COUNT(*) AS down
+            FROM interface i
+            JOIN device d ON d.id = i.device_id
+            JOIN state st ON st.id = i.state_id
+            WHERE i.last_seen = d.last_poll AND st.protocol != 'up' {admin}
+            GROUP BY d.id
+            HAVING down > ?
+            ORDER BY down DESC, d.name
+        """, params + (min_down,)).fetchall()
+
+    def timeline(self, device: str, interface: str, hours: float = None):
+        """[(ts, status, protocol)] state changes of one interface, oldest first."""
+        since = 0 if hours is None else int(time.time() - hours * 3600)
+        return self.db.execute("""
+            SELECT s.ts, st.status, st.protocol
+            FROM sample s
+            JOIN interface i ON i.id = s.iface_id
+            JOIN device d ON d.id = i.device_id
+            JOIN state st ON st.id = s.state_id
+            WHERE d.name = ? AND i.name = ? AND s.ts >= ?
+            ORDER BY s.ts
+        """, (device, interface, since)).fetchall()
+
+
+def _fmt_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interface state history")
+    parser.add_argument("--db", default=HISTORY_DB)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("flaps", help="interfaces that changed state in the last N hours")
+    p.add_argument("--hours", type=float, default=24)
+    p.add_argument("--min", type=int, default=1, dest="min_changes")
+    p.add_argument("--device")
+
+    p = sub.add_parser("down", help="devices with more than N down ports")
+    p.add_argument("--min", type=int, default=5, dest="min_down")
+    p.add_argument("--include-admin-down", action="store_true")
+
+    p = sub.add_parser("timeline", help="state changes of one interface")
+    p.add_argument("device")
+    p.add_argument("interface")
+    p.add_argument("--hours", type=float)
+
+    p = sub.add_parser("import", help="record existing <device>_show_ip_int_brief_compact.json files")
+    p.add_argument("files", nargs="+")
+
+    args = parser.parse_args()
+    history = InterfaceHistory(args.db)
+
+    if args.cmd == "flaps":
+        rows = history.flaps(args.hours, args.min_changes, args.device)
+        for dev, iface, n in rows:
+            print(f"{dev:<20} {iface:<28} {n:>5} changes")
+        print(f"{len(rows)} interfaces with >= {args.min_changes} changes in the last {args.hours:g}h")
+    elif args.cmd == "down":
+        rows = history.devices_with_down_ports(args.min_down, args.include_admin_down)
+        for dev, n in rows:
+            print(f"{dev:<20} {n:>5} down")
+        print(f"{len(rows)} devices with more than {args.min_down} down ports")
+    elif args.cmd == "timeline":
+        for ts, status, protocol in history.timeline(args.device, args.interface, args.hours):
+            print(f"{_fmt_ts(ts)}  {status}/{protocol}")
+    elif args.cmd == "import":
+        for path in args.files:
+            device = os.path.basename(path).split("_show_ip_int_brief")[0]
+            with open(path, "r") as f:
+                compact = json.load(f)
+            changes = history.record(device, compact.get("interfaces") or [], ts=os.path.getmtime(path))
+            print(f"{device}: recorded ({changes} changes)")
+
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,46 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
+import time
+import hashlib
 import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
 from pyats.topology import loader
 from openai import OpenAI
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from timing import span
+
+import rules
+from if_history import HISTORY_DB, InterfaceHistory
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("pyats-ai")
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise RuntimeError("Set OPENAI_API_KEY first (see steps below).")
+TESTBED_FILE = "testbed.yaml"
+AI_CACHE_FILE = ".ai_analysis_cache.json"
+AI_MODEL = "gpt-4o-mini"
+# bump when the prompt changes, so cached analyses from the old prompt are not reused
+PROMPT_VERSION = 2
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-TESTBED_FILE = "testbed.yaml"
-testbed = loader.load(TESTBED_FILE)
+@lru_cache(maxsize=1)
+def get_client():
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Set OPENAI_API_KEY first (see steps below).")
+    return OpenAI(api_key=OPENAI_API_KEY)
 
 
 def save_json(data, filename):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+    with span("file.write"):
+        with open(filename, "w") as f:
+            json.dump(data, f, indent=2)
 
 def summarize_int_brief(parsed):
     """
@@ -48,8 +68,9 @@ def summarize_int_brief(parsed):
 def analyze_with_ai(device_name, payload):
     prompt = f"""
 You are a Cisco network troubleshooting assistant.
-Analyze the following structured output from "show ip interface brief" for device {device_name}.
-1) List any interfaces that look unhealthy (down/down, administratively down, protocol down, missing IP where expected).
+A local rule check flagged the following interfaces from "show ip interface brief" on device {device_name}.
+Each row lists the issues found; interfaces not listed passed the checks.
+1) Confirm which flagged interfaces are really unhealthy (down/down, administratively down, protocol down, missing IP where expected, state changed since last run).
 2) Give likely causes and quick checks/commands.
 3) Provide a short "overall health" summary.
 Return the answer in clear bullet points.
@@ -58,42 +79,184 @@ Data:
 """.strip()
 
     # Responses API (recommended)
-    resp = client.responses.create(
-        model="gpt-4o-mini",
-        input=prompt,
-    )
+    with span("llm.responses", device=device_name):
+        resp = get_client().responses.create(
+            model=AI_MODEL,
+            input=prompt,
+        )
     return resp.output_text
 
-for device_name, device in testbed.devices.items():
+
+class RateLimiter:
+    """Spaces calls out to at most per_minute per minute, across threads."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def payload_hash(payload) -> str:
+    data = json.dumps({"model": AI_MODEL, "prompt": PROMPT_VERSION, "payload": payload}, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def load_ai_cache(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_ai_cache(path, cache):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_json(filename):
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def collect(device_name, device):
+    """Connect, parse and save one device. Returns (compact, compact from the previous run)."""
     log.info(f"Connecting to {device_name} ({device.connections.cli.ip}) ...")
-    try:
+    with span("ssh.connect", host=device_name):
         device.connect(
             log_stdout=False,
             init_exec_commands=[],
             init_config_commands=[],
         )
-    except Exception as e:
-        log.error(f"[{device_name}] connect failed: {e}")
-        continue
-
     try:
         log.info(f"[{device_name}] parsing: show ip interface brief")
-        parsed = device.parse("show ip interface brief")
+        with span("genie.parse", host=device_name, command="show ip interface brief"):
+            parsed = device.parse("show ip interface brief")
         save_json(parsed, f"{device_name}_show_ip_int_brief_full.json")
 
+        compact_file = f"{device_name}_show_ip_int_brief_compact.json"
+        previous = load_json(compact_file)
         compact = summarize_int_brief(parsed)
-        save_json(compact, f"{device_name}_show_ip_int_brief_compact.json")
+        save_json(compact, compact_file)
+        return compact, previous
+    finally:
+        device.disconnect()
+
+
+def analyze(device_name, compact, cache, limiter):
+    """AI analysis of one device, reusing last run's answer when the payload is unchanged."""
+    digest = payload_hash(compact)
+    cached = cache.get(device_name)
+    if cached and cached.get("hash") == digest:
+        log.info(f"[{device_name}] payload unchanged, reusing cached AI analysis")
+        return cached["analysis"], True
+
+    limiter.wait()
+    log.info(f"[{device_name}] sending to AI...")
+    ai_text = analyze_with_ai(device_name, compact)
+    cache[device_name] = {"hash": digest, "analysis": ai_text, "ts": round(time.time())}
+    return ai_text, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pyATS + AI interface health check")
+    parser.add_argument("--testbed", default=TESTBED_FILE)
+    parser.add_argument("--workers", type=int, default=10, help="devices collected in parallel")
+    parser.add_argument("--ai-workers", type=int, default=4, help="AI requests in flight at once")
+    parser.add_argument("--ai-rate", type=float, default=60, help="max AI requests per minute, 0 = no limit")
+    parser.add_argument("--cache", default=AI_CACHE_FILE, help="AI analysis cache file, '' to disable")
+    parser.add_argument("--escalate-at", choices=list(rules.SEVERITY), default=rules.ESCALATE_AT,
+                        help="lowest rule severity that sends a device to the AI")
+    parser.add_argument("--history", default=HISTORY_DB, help="interface state history database, '' to disable")
+    parser.add_argument("--flap-hours", type=float, default=24, help="window for flap detection from history")
+    parser.add_argument("--all-to-ai", action="store_true",
+                        help="skip the local rules and send every device's full output to the AI")
+    args = parser.parse_args()
 
-        log.info(f"[{device_name}] sending to AI...")
-        ai_text = analyze_with_ai(device_name, compact)
+    get_client()  # fail before touching any device if the API key is missing
+    testbed = loader.load(args.testbed)
+    cache = load_ai_cache(args.cache)
+    limiter = RateLimiter(args.ai_rate)
+    history = InterfaceHistory(args.history) if args.history else None
+
+    analyses, healthy, errors = {}, {}, {}
+    reused = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as collect_pool, \
+            ThreadPoolExecutor(max_workers=args.ai_workers) as ai_pool:
+        collecting = {
+            collect_pool.submit(collect, name, dev): name
+            for name, dev in testbed.devices.items()
+        }
+        # each device goes to the AI as soon as it is collected, while others are still being polled
+        analyzing = {}
+        for fut in as_completed(collecting):
+            name = collecting[fut]
+            try:
+                compact, previous = fut.result()
+            except Exception as e:
+                log.error(f"[{name}] collection failed: {e}")
+                errors[name] = str(e)
+                continue
+
+            flaps = None
+            if history:
+                history.record(name, compact.get("interfaces") or [])
+                flaps = history.flap_counts(name, hours=args.flap_hours)
+
+            if args.all_to_ai:
+                payload = compact
+            else:
+                # only devices with anomalies go to the AI, and only their anomalous rows
+                flagged = rules.classify(compact, previous, flaps)
+                if not rules.needs_ai(flagged, args.escalate_at):
+                    healthy[name] = rules.summary_line(flagged)
+                    log.info(f"[{name}] no anomalies ({healthy[name]}), skipping AI")
+                    continue
+                payload = compact if "interfaces" not in compact else rules.escalation_payload(flagged, args.escalate_at)
+            analyzing[ai_pool.submit(analyze, name, payload, cache, limiter)] = name
+
+        for fut in as_completed(analyzing):
+            name = analyzing[fut]
+            try:
+                analyses[name], was_cached = fut.result()
+                reused += was_cached
+            except Exception as e:
+                log.error(f"[{name}] AI analysis failed: {e}")
+                errors[name] = str(e)
+
+    save_ai_cache(args.cache, cache)
+    if history:
+        history.close()
+
+    # report in testbed order, not completion order
+    for name in testbed.devices:
+        if name in healthy:
+            print(f"{name}: OK - {healthy[name]}")
+        if name not in analyses:
+            continue
         print("\n" + "=" * 70)
-        print(f"AI analysis for {device_name}\n")
-        print(ai_text)
+        print(f"AI analysis for {name}\n")
+        print(analyses[name])
         print("=" * 70 + "\n")
 
-    except Exception as e:
-        log.error(f"[{device_name}] error: {e}")
-    finally:
-        device.disconnect()
+    log.info(f"Done. {len(healthy)} healthy (no AI call), {len(analyses)} analysed by AI "
+             f"({reused} from cache), {len(errors)} failed.")
+    for name, err in errors.items():
+        log.info(f"  {name}: {err}")
+
 
-log.info("Done.")
+if __name__ == "__main__":
+    main()
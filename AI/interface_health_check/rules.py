@@ -0,0 +1,100 @@
+"""
+Deterministic interface checks on the compact output of summarize_int_brief().
+
+Every interface gets a list of issues; a device is only worth an AI call when
+at least one issue is at or above ESCALATE_AT. Unused ports that are shut
+are normal, so admin-down on its own is only "info" unless it is new since
+the last run.
+"""
+
+SEVERITY = {"info": 0, "warning": 1, "critical": 2}
+ESCALATE_AT = "warning"
+
+ADMIN_DOWN = "administratively down"
+
+# state changes within the history window (if_history.py) that count as flapping
+FLAP_THRESHOLD = 3
+
+# interfaces that normally carry no IP of their own
+NO_IP_EXPECTED = ("Port-channel", "Dialer", "Virtual-Access", "NVI", "Null")
+
+
+def _state(row):
+    return f"{row.get('status')}/{row.get('protocol')}"
+
+
+def check_interface(row, previous=None, flaps=0):
+    """Issues for one interface row, as [(severity, code, text)]."""
+    issues = []
+    status = (row.get("status") or "").lower()
+    protocol = (row.get("protocol") or "").lower()
+    ip = (row.get("ip_address") or "unassigned").lower()
+    name = row.get("interface") or ""
+
+    if status == ADMIN_DOWN:
+        issues.append(("info", "admin_down", "administratively down"))
+    elif status == "up" and protocol != "up":
+        issues.append(("critical", "up_down", f"line up, protocol {protocol or 'unknown'}"))
+    elif status == "down":
+        issues.append(("warning", "down_down", f"down/{protocol or 'unknown'}"))
+
+    if status == "up" and protocol == "up" and ip == "unassigned" and not name.startswith(NO_IP_EXPECTED):
+        issues.append(("warning", "missing_ip", "up/up but no IP address"))
+
+    if previous is not None and _state(previous) != _state(row):
+        issues.append(("warning", "changed", f"was {_state(previous)} last run, now {_state(row)}"))
+
+    if flaps >= FLAP_THRESHOLD:
+        issues.append(("warning", "flapping", f"{flaps} state changes in the history window"))
+
+    return issues
+
+
+def classify(compact, previous_compact=None, flaps=None):
+    """
+    Check every interface of a device against the rules and against last run.
+    flaps is {interface: state changes} from if_history.py, if history is kept.
+    Returns the flagged rows: [{interface, ip_address, status, protocol, issues: [...]}].
+    """
+    rows = compact.get("interfaces")
+    if rows is None:
+        # parser output we could not reduce; let the AI look at it
+        return [{"interface": None, "issues": [{"severity": "warning", "code": "unparsed",
+                                                "text": "output could not be summarized"}]}]
+
+    previous = {r["interface"]: r for r in (previous_compact or {}).get("interfaces") or []}
+    flagged = []
+    for row in rows:
+        issues = check_interface(row, previous.get(row["interface"]) if previous else None,
+                                 (flaps or {}).get(row["interface"], 0))
+        if issues:
+            flagged.append(dict(row, issues=[{"severity": s, "code": c, "text": t} for s, c, t in issues]))
+
+    current = {r["interface"] for r in rows}
+    for name, row in previous.items():
+        if name not in current:
+            flagged.append(dict(row, issues=[{"severity": "warning", "code": "removed",
+                                              "text": "present last run, missing now"}]))
+    return flagged
+
+
+def needs_ai(flagged, escalate_at: str = ESCALATE_AT) -> bool:
+    level = SEVERITY[escalate_at]
+    return any(SEVERITY[i["severity"]] >= level for row in flagged for i in row["issues"])
+
+
+def escalation_payload(flagged, escalate_at: str = ESCALATE_AT) -> dict:
+    """Only the rows that made the device escalate, for the AI prompt."""
+    level = SEVERITY[escalate_at]
+    return {"anomalies": [row for row in flagged
+                          if any(SEVERITY[i["severity"]] >= level for i in row["issues"])]}
+
+
+def summary_line(flagged) -> str:
+    counts = {}
+    for row in flagged:
+        for issue in row["issues"]:
+            counts[issue["code"]] = counts.get(issue["code"], 0) + 1
+    if not counts:
+        return "all interfaces healthy"
+    return ", ".join(f"{n} {code.replace('_', ' ')}" for code, n in sorted(counts.items()))
@@ -1,5 +1,15 @@
 from netmiko import ConnectHandler
 import logging
+import os
+import sys
+from pathlib import Path
+
+# shared helpers: dedup backup store (BACKUP_STORE=<dir>), span timers (NETAUTO_TIMING=...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lib"))
+from config_store import open_store
+from timing import span
+
+STORE = open_store(os.getenv("BACKUP_STORE"))
 
 # Netmiko internal debug log (separate file)
 logging.basicConfig(filename="netmiko_debug.log", level=logging.DEBUG)
@@ -13,19 +23,27 @@ device = {
     "session_log": "session_log.txt",   # full SSH transcript
 }
 
-conn = ConnectHandler(**device)
+with span("ssh.connect", host=device["host"]):
+    conn = ConnectHandler(**device)
 
 # enter enable mode (needed on many Cisco devices for config)
-conn.enable()
+with span("ssh.enable", host=device["host"]):
+    conn.enable()
 
 # 1) Push config from file
-output = conn.send_config_from_file("config.txt")
+with span("cli.send_config", host=device["host"]):
+    output = conn.send_config_from_file("config.txt")
 print(output)
 
 # 2) Backup running-config to file
-running = conn.send_command("show running-config")
-with open("running-config-backup.txt", "w", encoding="utf-8") as f:
-    f.write(running)
+with span("cli.send_command", host=device["host"], command="show running-config"):
+    running = conn.send_command("show running-config")
+with span("file.write", host=device["host"]):
+    with open("running-config-backup.txt", "w", encoding="utf-8") as f:
+        f.write(running)
+if STORE:
+    with span("store.put", host=device["host"]):
+        STORE.put(device["host"], running, source="netmiko")
 
 conn.disconnect()
 print("Done. Backup + logs saved.")
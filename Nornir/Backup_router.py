@@ -1,3 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
 from nornir import InitNornir
 from nornir_napalm.plugins.tasks import napalm_get
 from nornir_utils.plugins.functions import print_result
@@ -5,6 +9,12 @@ from nornir_utils.plugins.tasks.files import write_file
 
 from nornir import InitNornir
 
+# shared dedup backup store (lib/config_store.py), enabled with BACKUP_STORE=<dir>
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lib"))
+from config_store import open_store
+
+STORE = open_store(os.getenv("BACKUP_STORE"))
+
 nr = InitNornir(config_file='config.yaml')
 
 
@@ -13,6 +23,8 @@ def backup(task):
     get_config = task.run(task=napalm_get, getters=['config'])
     get_running = get_config.result['config']['running']
     task.run(task=write_file, content=get_running, filename='running.txt')
+    if STORE:
+        STORE.put(task.host.name, get_running, source='nornir-napalm')
 
 result = nr.run(task=backup)
 
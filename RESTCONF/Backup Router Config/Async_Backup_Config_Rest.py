@@ -0,0 +1,168 @@
+#Async_Backup_Config_Rest.py
+#
+# Same backup as Backup_Config_Rest.py, but all hosts run concurrently over
+# one pooled aiohttp session (keep-alive, gzip), with a deadline per host.
+
+import argparse
+import asyncio
+import getpass
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import yaml
+
+# shared dedup backup store (lib/config_store.py), enabled with BACKUP_STORE=<dir>
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from config_store import open_store
+
+HOSTS_FILE = "hosts.yaml"
+OUT_DIR = "backups"
+
+# Cisco IOS XE REST API endpoint for running config (text/plain)
+RUNNING_CFG_PATH = "/api/v1/global/running-config"
+
+# If your routers use self-signed certs, set to False
+VERIFY_SSL = False
+
+CONCURRENCY = 100       # hosts in flight at the same time
+HOST_DEADLINE = 20      # seconds per host, connect + download
+CHUNK_SIZE = 64 * 1024
+
+STORE = open_store(os.getenv("BACKUP_STORE"))
+
+
+async def fetch_running(session, ip, outfile, partfile, stats):
+    start = time.perf_counter()
+    async with session.get(f"https://{ip}{RUNNING_CFG_PATH}") as r:
+        stats["status"] = r.status
+        stats["ttfb"] = time.perf_counter() - start
+
+        if r.status != 200:
+            body = await r.text()
+            stats["error"] = body[:200]
+            return
+
+        # stream straight to disk, never hold the whole config in memory
+        with open(partfile, "wb") as f:
+            async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                f.write(chunk)
+                stats["bytes"] += len(chunk)
+        os.replace(partfile, outfile)
+        stats["ok"] = True
+
+
+def store_backup(ip, outfile):
+    STORE.put(ip, outfile.read_text(encoding="utf-8"), source="restconf")
+
+
+async def backup_host(session, sem, ip, out_dir, deadline):
+    stats = {"host": ip, "ok": False, "status": None, "ttfb": None, "total": None, "bytes": 0, "error": None}
+    outfile = Path(out_dir) / f"{ip}_running-config.txt"
+    partfile = outfile.with_suffix(".part")
+
+    async with sem:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(fetch_running(session, ip, outfile, partfile, stats), deadline)
+        except asyncio.TimeoutError:
+            stats["error"] = f"deadline of {deadline}s exceeded"
+        except Exception as e:
+            stats["error"] = str(e) or type(e).__name__
+        finally:
+            stats["total"] = time.perf_counter() - start
+            if partfile.exists():
+                partfile.unlink()
+
+    if stats["ok"]:
+        if STORE:
+            # reading back, hashing and compressing the config is blocking work: keep it off the event loop
+            await asyncio.to_thread(store_backup, ip, outfile)
+        print(f"✅ Backed up {ip} -> {outfile} ({stats['total']:.2f}s)")
+    else:
+        print(f"❌ {ip} failed ({stats['status']}): {stats['error']}")
+
+    return stats
+
+
+async def backup_all(hosts, username, password, out_dir, concurrency, deadline):
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        ssl=None if VERIFY_SSL else False,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+    )
+    sem = asyncio.Semaphore(concurrency)
+
+    # aiohttp sends "Accept-Encoding: gzip, deflate" and decompresses transparently
+    async with aiohttp.ClientSession(
+        connector=connector,
+        auth=aiohttp.BasicAuth(username, password),
+        headers={"Accept": "text/plain", "Accept-Encoding": "gzip, deflate"},
+    ) as session:
+        tasks = [backup_host(session, sem, ip, out_dir, deadline) for ip in hosts]
+        return await asyncio.gather(*tasks)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def print_summary(results, wall):
+    ok = [r for r in results if r["ok"]]
+    totals = [r["total"] for r in ok]
+
+    print("\n===== LATENCY SUMMARY =====")
+    print(f"{'host':<20} {'status':>6} {'ttfb(s)':>8} {'total(s)':>9} {'bytes':>9}")
+    for r in sorted(results, key=lambda r: r["total"] or 0, reverse=True):
+        ttfb = f"{r['ttfb']:.3f}" if r["ttfb"] is not None else "-"
+        print(f"{r['host']:<20} {str(r['status'] or '-'):>6} {ttfb:>8} {r['total']:>9.3f} {r['bytes']:>9}")
+
+    print(f"\nhosts: {len(results)}  ok: {len(ok)}  failed: {len(results) - len(ok)}")
+    print(f"wall: {wall:.2f}s  throughput: {len(results) / wall:.1f} hosts/s")
+    if totals:
+        print(
+            f"latency p50: {percentile(totals, 50):.3f}s  "
+            f"p99: {percentile(totals, 99):.3f}s  "
+            f"mean: {statistics.mean(totals):.3f}s  max: {max(totals):.3f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent RESTCONF running-config backup")
+    parser.add_argument("--hosts", default=HOSTS_FILE)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--deadline", type=float, default=HOST_DEADLINE, help="seconds allowed per host")
+    parser.add_argument("--summary", help="also write the per-host latency summary to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.hosts, "r", encoding="utf-8") as f:
+        hosts = yaml.safe_load(f)["hosts"]
+
+    username = input("Username: ").strip()
+    password = getpass.getpass("Password: ")
+
+    Path(args.out).mkdir(exist_ok=True)
+
+    start = time.perf_counter()
+    results = asyncio.run(backup_all(hosts, username, password, args.out, args.concurrency, args.deadline))
+    wall = time.perf_counter() - start
+
+    print_summary(results, wall)
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump({"wall": wall, "hosts": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
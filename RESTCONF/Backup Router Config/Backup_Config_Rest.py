@@ -1,11 +1,17 @@
 #Backup_running_config.py
 
 import getpass
+import os
+import sys
 from pathlib import Path
 
 import requests
 import yaml
 
+# shared dedup backup store (lib/config_store.py), enabled with BACKUP_STORE=<dir>
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from config_store import open_store
+
 HOSTS_FILE = "hosts.yaml"
 OUT_DIR = "backups"
 
@@ -15,6 +21,8 @@ RUNNING_CFG_PATH = "/api/v1/global/running-config"
 # If your routers use self-signed certs, set to False
 VERIFY_SSL = False
 
+STORE = open_store(os.getenv("BACKUP_STORE"))
+
 
 with open(HOSTS_FILE, "r", encoding="utf-8") as f:
     hosts = yaml.safe_load(f)["hosts"]
@@ -41,6 +49,8 @@ for ip in hosts:
         if r.status_code == 200:
             outfile = Path(OUT_DIR) / f"{ip}_running-config.txt"
             outfile.write_text(r.text, encoding="utf-8")
+            if STORE:
+                STORE.put(ip, r.text, source="restconf")
             print(f"✅ Backed up {ip} -> {outfile}")
         else:
             print(f"❌ {ip} failed ({r.status_code}): {r.text}")
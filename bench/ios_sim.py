@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Simulated Cisco IOS devices over SSH, for benchmarking without real routers.
+
+Every device listens on its own port (base_port + index) and answers the
+handful of commands the scripts in this repo use from the text fixtures in
+./fixtures, including config mode. Latency and bandwidth can be tuned so a
+run looks like a WAN, a lab or a slow legacy box.
+
+    python ios_sim.py --count 100 --base-port 10000 --latency 0.05 --bandwidth 200000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import resource
+import time
+from pathlib import Path
+
+import asyncssh
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+USERNAME = "admin"
+PASSWORD = "cisco"
+
+# keyword tables used to expand IOS abbreviations ("sh ip int br", "conf t", "wr")
+KEYWORDS = [
+    "show", "configure", "terminal", "enable", "exit", "end", "logout", "write", "memory",
+    "running-config", "version", "vlan", "brief", "ip", "interface", "include", "section",
+    "length", "width", "no", "monitor", "copy", "startup-config",
+]
+
+
+# interface sub-commands (with or without "no "). In config-if anything else is
+# parsed as a global command and leaves the sub-mode, like IOS does; an indented
+# line always belongs to the interface.
+INTERFACE_COMMANDS = (
+    "description", "shutdown", "ip address", "ip helper-address", "ip ospf", "ip nat", "ip access-group",
+    "ip mtu", "ip vrf forwarding", "ip redirects", "ip unreachables", "ip proxy-arp", "ipv6", "vrf forwarding",
+    "switchport", "speed", "duplex", "encapsulation", "standby", "vrrp", "mtu", "bandwidth", "delay",
+    "channel-group", "spanning-tree", "negotiation", "cdp", "load-interval", "service-policy", "media-type",
+    "keepalive",
+)
+
+
+def interface_command(line: str) -> bool:
+    if line[:1].isspace():
+        return True
+    cmd = line.strip()
+    if cmd.startswith("no "):
+        cmd = cmd[3:]
+    return cmd.startswith(INTERFACE_COMMANDS)
+
+
+def load_fixtures() -> dict:
+    return {p.stem: p.read_text() for p in FIXTURES.glob("*.txt")}
+
+
+def expand(cmd: str) -> str:
+    """Expand abbreviated keywords before the first pipe, IOS style."""
+    head, sep, tail = cmd.partition("|")
+    words = []
+    for w in head.split():
+        matches = [k for k in KEYWORDS if k.startswith(w.lower())]
+        words.append(matches[0] if len(matches) == 1 or w.lower() in matches else w)
+    expanded = " ".join(words)
+    if sep:
+        tail = tail.strip()
+        f, _, arg = tail.partition(" ")
+        f = "include" if "include".startswith(f) else "section" if "section".startswith(f) else f
+        expanded += f" | {f} {arg}"
+    return expanded
+
+
+def apply_filter(text: str, flt: str) -> str:
+    kind, _, pattern = flt.partition(" ")
+    try:
+        regex = re.compile(pattern)
+    except re.error:
+        regex = re.compile(re.escape(pattern))
+    lines = text.splitlines()
+    if kind == "include":
+        return "\n".join(line for line in lines if regex.search(line))
+    if kind == "section":
+        out, keep = [], False
+        for line in lines:
+            if not line.startswith(" "):
+                keep = bool(regex.search(line))
+            if keep:
+                out.append(line)
+        return "\n".join(out)
+    return text
+
+
+class SimDevice:
+    def __init__(self, index: int, fixtures: dict, args):
+        self.index = index
+        self.name = f"sim{index:05d}"
+        self.hostname = f"sim{index:05d}"
+        self.serial = f"SIM{index:08d}"
+        self.fixtures = fixtures
+        self.args = args
+        self.extra_config = []
+
+    def render(self, name: str) -> str:
+        n1, n2 = divmod(self.index, 256)
+        text = self.fixtures.get(name, "")
+        for key, value in {
+            "hostname": self.hostname,
+            "serial": self.serial,
+            "mgmt_ip": f"192.168.{n1 % 256}.{n2}",
+            "n1": n1 % 256,
+            "n2": n2,
+        }.items():
+            text = text.replace("{{" + key + "}}", str(value))
+        return text
+
+    def running_config(self) -> str:
+        text = self.render("running_config")
+        if self.extra_config:
+            text = text.replace("\nend", "\n" + "\n".join(self.extra_config) + "\n!\nend")
+        return text
+
+    def execute(self, cmd: str) -> str:
+        cmd = expand(cmd)
+        base, _, flt = cmd.partition(" | ")
+
+        if base.startswith("terminal ") or base in ("", "no terminal monitor"):
+            return ""
+        if base in ("show running-config", "show startup-config"):
+            out = self.running_config()
+        elif base == "show version":
+            out = self.render("show_version")
+        elif base == "show vlan brief":
+            out = self.render("show_vlan_brief")
+        elif base == "show ip interface brief":
+            out = self.render("show_ip_interface_brief")
+        elif base in ("write memory", "write", "copy running-config startup-config"):
+            out = "Building configuration...\n[OK]"
+        else:
+            return "               ^\n% Invalid input detected at '^' marker.\n"
+
+        if flt:
+            out = apply_filter(out, flt)
+        return out
+
+
+class SimServer(asyncssh.SSHServer):
+    def __init__(self, args):
+        self.args = args
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    async def validate_password(self, username, password):
+        if self.args.connect_latency:
+            await asyncio.sleep(self.args.connect_latency)
+        return username == USERNAME and password == PASSWORD
+
+
+class Farm:
+    def __init__(self, args):
+        self.args = args
+        self.fixtures = load_fixtures()
+        self.devices = [SimDevice(i, self.fixtures, args) for i in range(args.count)]
+        self.sessions_log = open(args.sessions_log, "a") if args.sessions_log else None
+
+    def log_session(self, device, start, end, commands):
+        if not self.sessions_log:
+            return
+        self.sessions_log.write(json.dumps({
+            "device": device.name, "start": start, "end": end,
+            "duration": round(end - start, 4), "commands": commands,
+        }) + "\n")
+        self.sessions_log.flush()
+
+    async def send(self, process, text: str):
+        """Write output, paced to the configured bandwidth."""
+        if not text:
+            return
+        bw = self.args.bandwidth
+        if not bw:
+            process.stdout.write(text)
+            return
+        chunk = max(512, bw // 20)
+        for i in range(0, len(text), chunk):
+            process.stdout.write(text[i:i + chunk])
+            await asyncio.sleep(min(chunk, len(text) - i) / bw)
+
+    async def delay(self):
+        lat = self.args.latency
+        if lat:
+            await asyncio.sleep(max(0.0, random.gauss(lat, lat * self.args.jitter)))
+
+    async def handle(self, process, device: SimDevice):
+        start = time.time()
+        commands = 0
+        mode = "exec" if self.args.start_enabled else "user"
+        try:
+            while True:
+                prompt = {
+                    "user": f"{device.hostname}>",
+                    "exec": f"{device.hostname}#",
+                    "config": f"{device.hostname}(config)#",
+                    "config-if": f"{device.hostname}(config-if)#",
+                }[mode]
+                process.stdout.write(prompt)
+
+                line = await process.stdin.readline()
+                if not line:
+                    break
+                cmd = line.strip()
+                if not cmd:
+                    process.stdout.write("\n")
+                    continue
+                commands += 1
+                await self.delay()
+                words = expand(cmd)
+
+                if mode in ("config", "config-if"):
+                    if cmd.startswith("!"):
+                        continue   # comment
+                    if words == "end":
+                        mode = "exec"
+                    elif words == "exit":
+                        mode = "config" if mode == "config-if" else "exec"
+                    elif cmd.startswith("interface "):
+                        mode = "config-if"
+                        device.extra_config.append(cmd)
+                    elif mode == "config-if" and interface_command(line.rstrip("\r\n")):
+                        device.extra_config.append(f" {cmd}")
+                    else:
+                        mode = "config"
+                        if cmd.startswith("hostname "):
+                            device.hostname = cmd.split(None, 1)[1]
+                        device.extra_config.append(cmd)
+                    continue
+
+                if words in ("exit", "logout"):
+                    break
+                if words == "enable":
+                    if mode == "user":
+                        process.stdout.write("Password: ")
+                        process.channel.set_echo(False)
+                        await process.stdin.readline()
+                        process.channel.set_echo(True)
+                        process.stdout.write("\n")
+                        mode = "exec"
+                    continue
+                if words == "configure terminal":
+                    if mode != "exec":
+                        process.stdout.write("% Invalid input detected at '^' marker.\n")
+                        continue
+                    process.stdout.write("Enter configuration commands, one per line.  End with CNTL/Z.\n")
+                    mode = "config"
+                    continue
+
+                out = device.execute(cmd)
+                await self.send(process, out.replace("\r\n", "\n").rstrip("\n") + "\n" if out else "")
+        except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, ConnectionError):
+            pass
+        finally:
+            self.log_session(device, start, time.time(), commands)
+            process.exit(0)
+
+    async def start(self):
+        key = asyncssh.generate_private_key("ssh-rsa", key_size=2048)
+        for device in self.devices:
+            port = self.args.base_port + device.index
+
+            def factory(process, device=device):
+                return self.handle(process, device)
+
+            await asyncssh.create_server(
+                lambda: SimServer(self.args),
+                self.args.host,
+                port,
+                server_host_keys=[key],
+                process_factory=factory,
+                encoding="utf-8",
+                reuse_address=True,
+            )
+        print(f"READY {len(self.devices)} devices on {self.args.host}:{self.args.base_port}-"
+              f"{self.args.base_port + len(self.devices) - 1}", flush=True)
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Simulated IOS SSH device farm")
+    parser.add_argument("--count", type=int, default=10, help="number of devices")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=10000, help="device N listens on base-port + N")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every command")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency stddev as a fraction of --latency")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="seconds added to SSH auth")
+    parser.add_argument("--bandwidth", type=int, default=0, help="output bytes/second per session, 0 = unlimited")
+    parser.add_argument("--start-enabled", action="store_true", help="start sessions in privileged exec (#)")
+    parser.add_argument("--sessions-log", help="append one JSON line per finished SSH session to this file")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    raise_fd_limit()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(Farm(args).start())
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
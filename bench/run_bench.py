@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the device workflows in this repo.
+
+Starts a farm of simulated IOS devices (ios_sim.py) and runs the real scripts
+against it:
+
+  backup      cicd/backup/backup.py                        (Nornir + Scrapli)
+  compliance  pyats-lab/compliance_check/vlan_compliance.py  (pyATS / Genie)
+  push        pyats-lab/ZTP_Netbox/src/push.py               (Nornir + Netmiko)
+
+For every scenario and fleet size it reports wall time, devices/second and
+p50/p99 per-device time.
+
+    python run_bench.py --devices 10 100 1000 --latency 0.05 --workers 50
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parent
+FIXTURES = HERE / "fixtures"
+
+BACKUP_SCRIPT = REPO / "cicd" / "backup" / "backup.py"
+COMPLIANCE_SCRIPT = REPO / "pyats-lab" / "compliance_check" / "vlan_compliance.py"
+ZTP_SRC = REPO / "pyats-lab" / "ZTP_Netbox" / "src"
+
+USERNAME = "admin"
+PASSWORD = "cisco"
+SITE_SIZE = 10
+
+SCENARIOS = ["backup", "compliance", "push"]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def device_name(i):
+    return f"sim{i:05d}"
+
+
+def write_yaml(path, data):
+    with open(path, "w") as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+
+
+class Farm:
+    """ios_sim.py running in its own process, so it does not share a GIL with the clients."""
+
+    def __init__(self, count, args, workdir):
+        self.count = count
+        self.args = args
+        self.sessions_log = Path(workdir) / "sessions.jsonl"
+        self.proc = None
+
+    def __enter__(self):
+        cmd = [
+            sys.executable, str(HERE / "ios_sim.py"),
+            "--count", str(self.count),
+            "--base-port", str(self.args.base_port),
+            "--latency", str(self.args.latency),
+            "--connect-latency", str(self.args.connect_latency),
+            "--bandwidth", str(self.args.bandwidth),
+            "--sessions-log", str(self.sessions_log),
+        ]
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        line = self.proc.stdout.readline()
+        if not line.startswith("READY"):
+            self.proc.kill()
+            raise RuntimeError(f"device farm did not start: {line!r}")
+        return self
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+    def take_sessions(self):
+        """Per-session durations logged by the farm since the last call."""
+        if not self.sessions_log.exists():
+            return []
+        with open(self.sessions_log) as f:
+            sessions = [json.loads(line) for line in f if line.strip()]
+        self.sessions_log.write_text("")
+        return sessions
+
+
+# ---------------- scenarios ----------------
+
+def bench_backup(count, args, workdir):
+    wd = Path(workdir) / "backup"
+    wd.mkdir()
+    hosts = {
+        device_name(i): {
+            "hostname": "127.0.0.1",
+            "port": args.base_port + i,
+            "groups": ["cisco"],
+            "connection_options": {"scrapli": {"extras": {
+                "transport": args.scrapli_transport,
+                "auth_strict_key": False,
+            }}},
+        }
+        for i in range(count)
+    }
+    write_yaml(wd / "hosts.yaml", hosts)
+    write_yaml(wd / "groups.yaml", {"cisco": {"platform": "ios"}})
+    write_yaml(wd / "defaults.yaml", {"platform": "ios"})
+    write_yaml(wd / "config.yaml", {
+        "inventory": {"plugin": "SimpleInventory", "options": {
+            "host_file": "hosts.yaml", "group_file": "groups.yaml", "defaults_file": "defaults.yaml",
+        }},
+        "runner": {"plugin": "adaptive", "options": {
+            "min_workers": args.workers, "max_workers": args.workers, "host_deadline": 300,
+        }},
+    })
+
+    env = dict(os.environ, DEVICE_USERNAME=USERNAME, DEVICE_PASSWORD=PASSWORD, DEVICE_ENABLE_PASSWORD=PASSWORD)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(BACKUP_SCRIPT), "--incremental"],
+        cwd=wd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "backup.py failed")
+
+    # per-host client-side timings come from the checkpoint journal
+    per_device, failed = [], 0
+    with open(wd / "backup.journal.jsonl") as f:
+        for line in f:
+            entry = json.loads(line)
+            per_device.append(entry["elapsed"])
+            failed += entry["status"] != "ok"
+    failed += count - len(per_device)
+    return wall, per_device, failed
+
+
+def bench_compliance(count, args, workdir):
+    if importlib.util.find_spec("pyats") is None:
+        raise RuntimeError("pyATS is not installed")
+
+    wd = Path(workdir) / "compliance"
+    wd.mkdir()
+    devices = {}
+    for i in range(count):
+        devices[device_name(i)] = {
+            "os": "iosxe",
+            "type": "switch",
+            "platform": "x86",
+            "credentials": {"default": {"username": USERNAME, "password": PASSWORD},
+                            "enable": {"password": PASSWORD}},
+            "connections": {"cli": {"protocol": "ssh", "ip": "127.0.0.1", "port": args.base_port + i}},
+            "custom": {"site": f"site{i // SITE_SIZE:04d}", **({"is_site_baseline": True} if i % SITE_SIZE == 0 else {})},
+        }
+    write_yaml(wd / "devices.yaml", {"devices": devices})
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(COMPLIANCE_SCRIPT)],
+        cwd=wd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "vlan_compliance.py failed")
+    return wall, None, 0
+
+
+def bench_push(count, args, workdir):
+    from nornir import InitNornir
+
+    sys.path.insert(0, str(ZTP_SRC))
+    from push import push_rendered_config
+
+    wd = Path(workdir) / "push"
+    wd.mkdir()
+    hosts = {
+        device_name(i): {
+            "hostname": "127.0.0.1",
+            "port": args.base_port + i,
+            "username": USERNAME,
+            "password": PASSWORD,
+            "platform": "cisco_ios",
+            "connection_options": {"netmiko": {"extras": {"secret": PASSWORD}}},
+        }
+        for i in range(count)
+    }
+    write_yaml(wd / "hosts.yaml", hosts)
+    nr = InitNornir(
+        inventory={"plugin": "SimpleInventory", "options": {"host_file": str(wd / "hosts.yaml")}},
+        runner={"plugin": "threaded", "options": {"num_workers": 1}},
+        logging={"enabled": False},
+    )
+
+    template = (FIXTURES / "push_config.txt").read_text()
+
+    def push_one(i):
+        n1, n2 = divmod(i, 256)
+        cfg = (template.replace("{{hostname}}", device_name(i))
+               .replace("{{n1}}", str(n1 % 256)).replace("{{n2}}", str(n2)))
+        t = time.perf_counter()
+        result = push_rendered_config(nr, device_name=device_name(i), rendered_cfg=cfg)
+        nr.filter(name=device_name(i)).close_connections()
+        return time.perf_counter() - t, result.failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        outcomes = list(pool.map(push_one, range(count)))
+    wall = time.perf_counter() - start
+
+    return wall, [t for t, _ in outcomes], sum(1 for _, failed in outcomes if failed)
+
+
+RUNNERS = {"backup": bench_backup, "compliance": bench_compliance, "push": bench_push}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repo workflows against simulated IOS devices")
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100], help="fleet sizes to run")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--workers", type=int, default=20, help="client-side parallelism")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per command")
+    parser.add_argument("--connect-latency", type=float, default=0.1, help="simulated seconds for SSH auth")
+    parser.add_argument("--bandwidth", type=int, default=0, help="simulated bytes/second per session, 0 = unlimited")
+    parser.add_argument("--base-port", type=int, default=10000)
+    parser.add_argument("--scrapli-transport", default="system", help="scrapli transport for the backup scenario")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args()
+
+    workroot = tempfile.mkdtemp(prefix="netauto-bench-")
+    rows = []
+    try:
+        for count in args.devices:
+            with Farm(count, args, workroot) as farm:
+                for scenario in args.scenarios:
+                    workdir = Path(workroot) / f"{count}"
+                    workdir.mkdir(exist_ok=True)
+                    farm.take_sessions()
+                    print(f"[{scenario}] {count} devices ...", flush=True)
+                    try:
+                        wall, per_device, failed = RUNNERS[scenario](count, args, workdir)
+                    except Exception as e:
+                        print(f"[{scenario}] skipped: {e}")
+                        continue
+
+                    sessions = farm.take_sessions()
+                    if per_device is None:
+                        # no client-side timings: use how long each device had a session open
+                        per_device = [s["duration"] for s in sessions]
+
+                    rows.append({
+                        "scenario": scenario,
+                        "devices": count,
+                        "wall": round(wall, 3),
+                        "throughput": round(count / wall, 2),
+                        "p50": percentile(per_device, 50),
+                        "p99": percentile(per_device, 99),
+                        "mean": round(statistics.mean(per_device), 3) if per_device else None,
+                        "sessions": len(sessions),
+                        "failed": failed,
+                    })
+    finally:
+        if args.keep_workdir:
+            print(f"work dir kept: {workroot}")
+        else:
+            shutil.rmtree(workroot, ignore_errors=True)
+
+    print(f"\n{'scenario':<11} {'devices':>7} {'wall(s)':>8} {'dev/s':>8} {'p50(s)':>7} {'p99(s)':>7} {'sess':>6} {'failed':>6}")
+    for r in rows:
+        p50 = f"{r['p50']:.3f}" if r["p50"] is not None else "-"
+        p99 = f"{r['p99']:.3f}" if r["p99"] is not None else "-"
+        print(f"{r['scenario']:<11} {r['devices']:>7} {r['wall']:>8.2f} {r['throughput']:>8.2f} "
+              f"{p50:>7} {p99:>7} {r['sessions']:>6} {r['failed']:>6}")
+
+    with open(args.output, "w") as f:
+        json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+    print(f"\nresults -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
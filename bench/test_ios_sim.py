@@ -0,0 +1,69 @@
+"""
+Config mode of the simulated devices: a pushed interface block must end up in
+the running-config the way IOS shows it. Runs under pytest or on its own:
+
+    python test_ios_sim.py
+"""
+
+import asyncio
+
+from ios_sim import FIXTURES, Farm, build_parser
+
+
+class FakeStdin:
+    def __init__(self, lines):
+        self.lines = [line + "\n" for line in lines]
+
+    async def readline(self):
+        return self.lines.pop(0) if self.lines else ""
+
+
+class FakeStdout:
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text += text
+
+
+class FakeProcess:
+    def __init__(self, lines):
+        self.stdin = FakeStdin(lines)
+        self.stdout = FakeStdout()
+
+    def exit(self, status):
+        pass
+
+
+def push(lines):
+    farm = Farm(build_parser().parse_args(["--count", "1", "--start-enabled"]))
+    device = farm.devices[0]
+    asyncio.run(farm.handle(FakeProcess(["configure terminal"] + lines), device))
+    return device
+
+
+def test_interface_block_stays_in_interface():
+    cfg = push([line for line in (FIXTURES / "push_config.txt").read_text()
+                .replace("{{hostname}}", "R1").replace("{{n1}}", "0").replace("{{n2}}", "1").splitlines()
+                if line.strip()])
+    running = cfg.running_config()
+    assert "interface Loopback100\n description bench\n ip address 10.100.0.1 255.255.255.255\n" in running
+    assert "\nip address" not in running
+    # global lines after the block leave the interface
+    assert "\nlogging host 192.168.199.50 transport udp port 514\nntp server 192.168.199.80\n" in running
+    assert "\nip domain name lab.local\n" in running
+    assert cfg.hostname == "R1"
+
+
+def test_unindented_sub_commands_and_global_ip_lines():
+    cfg = push(["interface GigabitEthernet0/1", "ip address 10.0.0.1 255.255.255.0", "no shutdown",
+                "ip route 0.0.0.0 0.0.0.0 10.0.0.254", "no ip domain-lookup", "end"])
+    running = cfg.running_config()
+    assert ("interface GigabitEthernet0/1\n ip address 10.0.0.1 255.255.255.0\n no shutdown\n"
+            "ip route 0.0.0.0 0.0.0.0 10.0.0.254\nno ip domain-lookup\n") in running
+
+
+if __name__ == "__main__":
+    test_interface_block_stays_in_interface()
+    test_unindented_sub_commands_and_global_ip_lines()
+    print("ok")
@@ -0,0 +1,197 @@
+import json
+import math
+import os
+import queue
+import threading
+import time
+
+
+class HostDeadlineExceeded(Exception):
+    pass
+
+
+class HostNotRun(Exception):
+    pass
+
+
+class AdaptiveRunner:
+    """
+    Threaded runner that learns from the previous run.
+
+    - hosts are started slowest-first, using the per-host timings saved last run
+    - the worker pool is sized so the expected work fits in about the time of the
+      slowest host, but never below min_workers or above max_workers
+      (max_workers is what protects TACACS from a login storm)
+    - a host still running after host_deadline seconds is reported as failed and
+      the run goes on without it: its thread is left behind and a new worker
+      takes its place, as long as the stuck threads (which keep their sessions
+      open) plus the pool stay within max_workers. If hung hosts hold all
+      max_workers sessions, the hosts still queued are reported as not run.
+    - hosts that timed out last run are started last, so they cannot tie up
+      the workers at the start of the next run
+
+    Arguments:
+        min_workers: lower bound for the pool
+        max_workers: upper bound for open sessions, hung ones included
+        host_deadline: seconds a single host may take
+        timings_file: JSON file with {host: seconds} from previous runs
+        default_latency: estimate used for hosts never seen before
+    """
+
+    def __init__(
+        self,
+        min_workers: int = 4,
+        max_workers: int = 20,
+        host_deadline: float = 300,
+        timings_file: str = ".runner_timings.json",
+        default_latency: float = 10.0,
+    ) -> None:
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.host_deadline = host_deadline
+        self.timings_file = timings_file
+        self.default_latency = default_latency
+
+    # ---------- timings ----------
+
+    def load_timings(self) -> dict:
+        if not self.timings_file or not os.path.exists(self.timings_file):
+            return {}
+        with open(self.timings_file, "r") as f:
+            return json.load(f)
+
+    def save_timings(self, timings: dict) -> None:
+        if not self.timings_file:
+            return
+        tmp = f"{self.timings_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(sorted(timings.items())), f, indent=2)
+        os.replace(tmp, self.timings_file)
+
+    def plan(self, hosts, timings):
+        """Return (hosts ordered slowest-first, number of workers)."""
+        # a saved host_deadline means the host timed out: start it last, size the pool without it
+        stragglers = {h.name for h in hosts if timings.get(h.name, 0) >= self.host_deadline}
+        known = [timings[h.name] for h in hosts if h.name in timings and h.name not in stragglers]
+        default = sorted(known)[len(known) // 2] if known else self.default_latency
+        estimate = {h.name: default if h.name in stragglers else timings.get(h.name, default) for h in hosts}
+
+        ordered = sorted(hosts, key=lambda h: (h.name in stragglers, -estimate[h.name]))
+        if not ordered:
+            return ordered, self.min_workers
+
+        total = sum(estimate.values())
+        slowest = max(estimate.values()) or self.default_latency
+        workers = math.ceil(total / slowest)
+        workers = max(self.min_workers, min(self.max_workers, workers, len(ordered)))
+        return ordered, workers
+
+    def workers_wanted(self, num_workers, stuck):
+        """Live threads to keep: the pool plus one per hung host, within max_workers."""
+        return min(num_workers + stuck, self.max_workers)
+
+    # ---------- run ----------
+
+    def run(self, task, hosts):
+        # imported here so plan() and the timings work (and are tested) without nornir
+        from nornir.core.task import AggregatedResult, MultiResult, Result
+
+        result = AggregatedResult(task.name)
+        timings = self.load_timings()
+        ordered, num_workers = self.plan(hosts, timings)
+
+        todo = queue.Queue()
+        for host in ordered:
+            todo.put(host)
+
+        lock = threading.Lock()
+        started = {}
+        finished = {}
+        elapsed = {}
+        timed_out = set()
+
+        def worker():
+            while True:
+                try:
+                    host = todo.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.monotonic()
+                with lock:
+                    started[host.name] = start
+                multi = task.copy().start(host)
+                with lock:
+                    elapsed[host.name] = time.monotonic() - start
+                    finished[host.name] = multi
+                    if host.name in timed_out:
+                        return   # a replacement may have been started, keep the pool at its size
+
+        # daemon threads: a straggler past its deadline must not keep the process alive
+        threads = []
+
+        def add_worker():
+            t = threading.Thread(target=worker, daemon=True)
+            threads.append(t)
+            t.start()
+
+        for _ in range(num_workers):
+            add_worker()
+
+        not_run = "no worker left"
+        while True:
+            with lock:
+                now = time.monotonic()
+                late = [
+                    name for name, start in started.items()
+                    if name not in finished and name not in timed_out and now - start > self.host_deadline
+                ]
+                timed_out.update(late)
+                stuck = len(timed_out - finished.keys())
+                done = len(finished) + stuck
+            if done >= len(ordered):
+                break
+            alive = sum(t.is_alive() for t in threads)
+            if not todo.empty():
+                if stuck >= self.max_workers:
+                    not_run = f"all {self.max_workers} sessions are held by hosts past the deadline"
+                    break
+                # a thread stuck on a late host is lost to the pool: start one in its place
+                for _ in range(self.workers_wanted(num_workers, stuck) - alive):
+                    add_worker()
+            elif not alive:
+                break   # a worker died without finishing its host
+            time.sleep(0.2)
+
+        # nothing may start after this point, even if a hung thread comes back
+        while True:
+            try:
+                todo.get_nowait()
+            except queue.Empty:
+                break
+
+        with lock:
+            for host in ordered:
+                if host.name in finished:
+                    result[host.name] = finished[host.name]
+                    timings[host.name] = self._smooth(timings.get(host.name), elapsed[host.name])
+                    continue
+                if host.name in timed_out:
+                    exc = HostDeadlineExceeded(f"{host.name} did not finish within {self.host_deadline}s")
+                    timings[host.name] = self.host_deadline
+                else:
+                    exc = HostNotRun(f"{host.name} was not run: {not_run}")
+                multi = MultiResult(task.name)
+                r = Result(host, exception=exc, result=str(exc), failed=True)
+                r.name = task.name
+                multi.append(r)
+                result[host.name] = multi
+
+        self.save_timings(timings)
+        return result
+
+    @staticmethod
+    def _smooth(previous, current):
+        # exponential moving average keeps one odd run from reshuffling everything
+        if previous is None:
+            return round(current, 3)
+        return round(0.5 * previous + 0.5 * current, 3)
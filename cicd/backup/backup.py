@@ -1,50 +1,169 @@
 #!/usr/bin/env python3
 
+import argparse
+import json
 import os
+import sys
+from pathlib import Path
 from nornir import InitNornir
+from nornir.core.inventory import ConnectionOptions
+from nornir.core.plugins.runners import RunnersPluginRegister
 from nornir_scrapli.tasks import send_command
 from nornir_utils.plugins.functions import print_result
 
+from adaptive_runner import AdaptiveRunner
+from checkpoint import Journal, JournalProcessor
+from manifest import config_digest, load_manifest, save_manifest
+
+# shared helpers: dedup backup store (BACKUP_STORE=<dir>), span timers (NETAUTO_TIMING=...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from config_store import open_store  # noqa: E402
+from timing import span  # noqa: E402
+
 # Read credentials from environment
 DEVICE_USERNAME = os.getenv("DEVICE_USERNAME")
 DEVICE_PASSWORD = os.getenv("DEVICE_PASSWORD")
 DEVICE_ENABLE_PASSWORD = os.getenv("DEVICE_ENABLE_PASSWORD")
 
-if not DEVICE_USERNAME or not DEVICE_PASSWORD:
-    raise ValueError(
-        "Environment variables DEVICE_USERNAME and DEVICE_PASSWORD must be set!"
-    )
+BACKUP_DIR = "./backup"
+MANIFEST_FILE = os.path.join(BACKUP_DIR, ".manifest.json")
+SUMMARY_FILE = "backup-summary.json"
+JOURNAL_FILE = "backup.journal.jsonl"
+STORE = open_store(os.getenv("BACKUP_STORE"))
 
-# Initialize Nornir
-nr = InitNornir(config_file="config.yaml")
+# "runner: plugin: adaptive" in config.yaml
+RunnersPluginRegister.register("adaptive", AdaptiveRunner)
 
-# Optionally, override host credentials dynamically
-for host in nr.inventory.hosts.values():
-    host.username = DEVICE_USERNAME
-    host.password = DEVICE_PASSWORD
-    
-    if DEVICE_ENABLE_PASSWORD:
-        # Ensure scrapli connection options exist
-        if "scrapli" not in host.connection_options:
-            host.connection_options["scrapli"] = ConnectionOptions(extras={})
-        if host.connection_options["scrapli"].extras is None:
-            host.connection_options["scrapli"].extras = {}
 
-        # This is what scrapli actually uses for enable password
-        host.connection_options["scrapli"].extras["auth_secondary"] = DEVICE_ENABLE_PASSWORD
+def write_backup(filename, config):
+    with span("file.write", file=filename):
+        with open(filename, "w") as f:
+            f.write(config)
 
 
+def backup_config(task, manifest=None):
+    host = task.host.name
 
+    # open the session up front so connect/auth/enable is timed apart from the command
+    with span("ssh.connect", host=host):
+        task.host.get_connection("scrapli", task.nornir.config)
 
-BACKUP_DIR = "./backup"
-os.makedirs(BACKUP_DIR, exist_ok=True)
+    with span("cli.send_command", host=host, command="show running-config"):
+        result = task.run(task=send_command, command="show running-config")
+    config = result.result
+    filename = os.path.join(BACKUP_DIR, f"{host}.cfg")
+    if STORE:
+        with span("store.put", host=host):
+            STORE.put(host, config, source="cicd/backup")
+
+    # full mode: always rewrite, like before
+    if manifest is None:
+        write_backup(filename, config)
+        return {"status": "changed", "digest": None, "file": filename}
+
+    digest = config_digest(config)
+    previous = manifest.get(host)
+    if previous is None and os.path.exists(filename):
+        # no manifest entry yet (first incremental run): hash what is on disk
+        with open(filename, "r") as f:
+            previous = config_digest(f.read())
+
+    if previous == digest and os.path.exists(filename):
+        return {"status": "unchanged", "digest": digest, "file": filename}
+
+    write_backup(filename, config)
+    return {"status": "changed", "digest": digest, "file": filename}
+
+
+def summarize(results, manifest):
+    """Split hosts into changed/unchanged/failed and update the manifest."""
+    summary = {"changed": [], "unchanged": [], "failed": []}
+    for host, multi in results.items():
+        if multi.failed:
+            summary["failed"].append(host)
+            continue
+        outcome = multi[0].result
+        summary[outcome["status"]].append(host)
+        manifest[host] = outcome["digest"]
+
+    for hosts in summary.values():
+        hosts.sort()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up running configs with Nornir + Scrapli")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rewrite backups whose normalized content changed")
+    parser.add_argument("--summary", default=SUMMARY_FILE,
+                        help=f"where to write the changed/unchanged JSON summary (default: {SUMMARY_FILE})")
+    parser.add_argument("--resume", action="store_true",
+                        help="only back up hosts that failed or never ran in the journaled run")
+    parser.add_argument("--journal", default=JOURNAL_FILE,
+                        help=f"per-host checkpoint journal (default: {JOURNAL_FILE})")
+    args = parser.parse_args()
+
+    if not DEVICE_USERNAME or not DEVICE_PASSWORD:
+        raise ValueError(
+            "Environment variables DEVICE_USERNAME and DEVICE_PASSWORD must be set!"
+        )
+
+    # Initialize Nornir
+    nr = InitNornir(config_file="config.yaml")
+
+    # Optionally, override host credentials dynamically
+    for host in nr.inventory.hosts.values():
+        host.username = DEVICE_USERNAME
+        host.password = DEVICE_PASSWORD
+
+        if DEVICE_ENABLE_PASSWORD:
+            # Ensure scrapli connection options exist
+            if "scrapli" not in host.connection_options:
+                host.connection_options["scrapli"] = ConnectionOptions(extras={})
+            if host.connection_options["scrapli"].extras is None:
+                host.connection_options["scrapli"].extras = {}
+
+            # This is what scrapli actually uses for enable password
+            host.connection_options["scrapli"].extras["auth_secondary"] = DEVICE_ENABLE_PASSWORD
+
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+
+    journal = Journal(args.journal)
+    if args.resume:
+        pending = journal.pending(nr.inventory.hosts)
+        print(f"Resuming: {len(pending)} of {len(nr.inventory.hosts)} hosts left")
+        if not pending:
+            return
+        nr = nr.filter(filter_func=lambda h: h.name in pending)
+    journal.start(resume=args.resume)
+    nr = nr.with_processors([JournalProcessor(journal)])
+
+    if not args.incremental:
+        with span("nornir.run", task="backup_config"):
+            results = nr.run(task=backup_config)
+        print_result(results)
+        return
+
+    manifest = load_manifest(MANIFEST_FILE)
+    with span("nornir.run", task="backup_config"):
+        results = nr.run(task=backup_config, manifest=dict(manifest))
+    print_result(results)
+
+    updated = dict(manifest)
+    summary = summarize(results, updated)
+    if updated != manifest:
+        save_manifest(MANIFEST_FILE, updated)
+
+    with open(args.summary, "w") as f:
+        json.dump(summary, f, indent=2)
+        f.write("\n")
+
+    print(
+        f"changed={len(summary['changed'])} "
+        f"unchanged={len(summary['unchanged'])} "
+        f"failed={len(summary['failed'])} -> {args.summary}"
+    )
 
-def backup_config(task):
-    result = task.run(task=send_command, command="show running-config")
-    filename = os.path.join(BACKUP_DIR, f"{task.host.name}.cfg")
-    with open(filename, "w") as f:
-        f.write(result.result)
-    task.log(f"Backup saved to {filename}")
 
-results = nr.run(task=backup_config)
-print_result(results)
+if __name__ == "__main__":
+    main()
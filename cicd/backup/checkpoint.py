@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import time
+
+
+class Journal:
+    """
+    Append-only JSONL checkpoint of a backup run, one line per finished host:
+
+        {"host": "R1", "status": "ok", "elapsed": 4.2, "ts": 1700000000.0, "error": null}
+
+    Lines are flushed and fsynced as they are written, so a crash or a CI
+    timeout keeps everything that finished before it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def start(self, resume: bool = False) -> None:
+        """A fresh run forgets the previous journal, a resumed one appends to it."""
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def record(self, host: str, status: str, elapsed: float, error: str = None) -> None:
+        line = json.dumps({
+            "host": host,
+            "status": status,
+            "elapsed": round(elapsed, 3),
+            "ts": round(time.time(), 3),
+            "error": error,
+        })
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def last_status(self) -> dict:
+        """{host: last recorded status}; a torn last line from a crash is ignored."""
+        status = {}
+        if not os.path.exists(self.path):
+            return status
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                status[entry["host"]] = entry["status"]
+        return status
+
+    def pending(self, hosts) -> set:
+        """Hosts that failed or never ran."""
+        status = self.last_status()
+        return {h for h in hosts if status.get(h) != "ok"}
+
+
+class JournalProcessor:
+    """Nornir processor that writes a journal line whenever a host finishes the task."""
+
+    def __init__(self, journal: Journal):
+        self.journal = journal
+        self._started = {}
+
+    def task_started(self, task):
+        pass
+
+    def task_completed(self, task, result):
+        pass
+
+    def task_instance_started(self, task, host):
+        self._started[host.name] = time.monotonic()
+
+    def task_instance_completed(self, task, host, result):
+        elapsed = time.monotonic() - self._started.pop(host.name, time.monotonic())
+        error = None
+        if result.failed:
+            exc = result[0].exception
+            error = str(exc) if exc else "failed"
+        self.journal.record(host.name, "failed" if result.failed else "ok", elapsed, error)
+
+    def subtask_instance_started(self, task, host):
+        pass
+
+    def subtask_instance_completed(self, task, host, result):
+        pass
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+import re
+
+# Lines IOS rewrites on every "show running-config" even when nothing changed.
+# They are dropped before hashing so they never count as a config change.
+VOLATILE_PATTERNS = [
+    re.compile(r"^Building configuration"),
+    re.compile(r"^Current configuration\s*:"),
+    re.compile(r"^! Last configuration change at "),
+    re.compile(r"^! NVRAM config last updated at "),
+    re.compile(r"^! No configuration change since last restart"),
+    re.compile(r"^ntp clock-period "),
+]
+
+
+def normalize_config(text: str) -> str:
+    """Return the config without volatile lines and trailing whitespace."""
+    lines = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if any(p.match(line) for p in VOLATILE_PATTERNS):
+            continue
+        lines.append(line)
+
+    # leading/trailing blank lines vary between platforms and transports
+    while lines and not lines[0]:
+        lines.pop(0)
+    while lines and not lines[-1]:
+        lines.pop()
+
+    return "\n".join(lines) + "\n"
+
+
+def config_digest(text: str) -> str:
+    """SHA-256 of the normalized config."""
+    return hashlib.sha256(normalize_config(text).encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: str) -> dict:
+    """Return {host: digest} from a previous run, or {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("hosts", {})
+
+
+def save_manifest(path: str, hosts: dict) -> None:
+    """Write the manifest atomically so a crash never leaves half a file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"hosts": dict(sorted(hosts.items()))}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
@@ -0,0 +1,171 @@
+"""
+AdaptiveRunner: ordering and pool sizing (plain Python), and runs with hosts
+that hang past host_deadline (needs nornir): the run must still return, with
+every host reported, without opening more than max_workers sessions.
+Runs under pytest or on its own:
+
+    python test_adaptive_runner.py
+"""
+
+import importlib.util
+import json
+import threading
+import time
+
+from adaptive_runner import AdaptiveRunner, HostDeadlineExceeded, HostNotRun
+
+HAVE_NORNIR = importlib.util.find_spec("nornir") is not None
+try:
+    import pytest
+    needs_nornir = pytest.mark.skipif(not HAVE_NORNIR, reason="nornir not installed")
+except ImportError:   # run on its own, see __main__
+    def needs_nornir(fn):
+        return fn
+
+release = threading.Event()   # set at the end so the hung threads can exit
+
+
+class FakeHost:
+    def __init__(self, name):
+        self.name = name
+
+
+def names(hosts):
+    return [h.name for h in hosts]
+
+
+# ---------- plan() and pool size, no nornir needed ----------
+
+def test_plan_orders_slowest_first_and_sizes_pool():
+    runner = AdaptiveRunner(min_workers=2, max_workers=10, host_deadline=300)
+    hosts = [FakeHost(n) for n in ("fast", "slow", "mid", "new")]
+    ordered, workers = runner.plan(hosts, {"fast": 1.0, "slow": 20.0, "mid": 5.0})
+    # "new" gets the median of the known timings (5.0), ties keep inventory order
+    assert names(ordered) == ["slow", "mid", "new", "fast"]
+    # 31s of work over a 20s slowest host
+    assert workers == 2
+
+
+def test_plan_bounds():
+    runner = AdaptiveRunner(min_workers=2, max_workers=4, host_deadline=300)
+    hosts = [FakeHost(f"R{i}") for i in range(50)]
+    _, workers = runner.plan(hosts, {h.name: 10.0 for h in hosts})
+    assert workers == 4     # 50 equal hosts would want 50 workers
+    _, workers = runner.plan(hosts[:1], {})
+    assert workers == 2     # never below min_workers
+    ordered, workers = runner.plan([], {})
+    assert ordered == [] and workers == 2
+
+
+def test_plan_starts_timed_out_hosts_last():
+    runner = AdaptiveRunner(min_workers=1, max_workers=10, host_deadline=300)
+    hosts = [FakeHost(n) for n in ("hung", "slow", "fast")]
+    ordered, workers = runner.plan(hosts, {"hung": 300, "slow": 20.0, "fast": 2.0})
+    assert names(ordered) == ["slow", "fast", "hung"]
+    # the hung host counts as a median host (20s here), not as 300s: 42s of work over 20s
+    assert workers == 3
+
+
+def test_workers_wanted_counts_stuck_threads():
+    runner = AdaptiveRunner(min_workers=2, max_workers=5)
+    assert runner.workers_wanted(3, 0) == 3
+    assert runner.workers_wanted(3, 2) == 5
+    assert runner.workers_wanted(3, 4) == 5   # stuck sessions stay open: never above max_workers
+
+
+# ---------- run(), with nornir ----------
+
+class FakeTask:
+    """Stands in for nornir's Task: hosts named hang* block until released."""
+
+    name = "backup_config"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open = 0
+        self.peak = 0
+
+    def copy(self):
+        return self
+
+    def start(self, host):
+        from nornir.core.task import MultiResult, Result
+
+        with self.lock:
+            self.open += 1
+            self.peak = max(self.peak, self.open)
+        try:
+            if host.name.startswith("hang"):
+                release.wait(30)
+            else:
+                time.sleep(0.05)
+        finally:
+            with self.lock:
+                self.open -= 1
+        multi = MultiResult(self.name)
+        multi.append(Result(host, result="ok"))
+        return multi
+
+
+def run(tmp_path, hosts, **options):
+    runner = AdaptiveRunner(host_deadline=0.5, timings_file=str(tmp_path / "timings.json"), **options)
+    task = FakeTask()
+    start = time.monotonic()
+    result = runner.run(task, hosts)
+    return runner, task, result, time.monotonic() - start
+
+
+@needs_nornir
+def test_hung_hosts_do_not_stall_the_run(tmp_path):
+    hosts = [FakeHost(f"hang{i}") for i in range(3)] + [FakeHost(f"R{i}") for i in range(6)]
+    try:
+        runner, task, result, took = run(tmp_path, hosts, min_workers=2, max_workers=5)
+        # both workers get stuck on hang hosts; replacements run the queued hosts
+        assert took < 5, f"run took {took:.1f}s"
+        assert sorted(result) == sorted(names(hosts))
+        for i in range(3):
+            assert isinstance(result[f"hang{i}"][0].exception, HostDeadlineExceeded)
+        for i in range(6):
+            assert not result[f"R{i}"].failed
+        assert task.peak <= 5
+
+        # next run: the stragglers go last
+        timings = json.loads((tmp_path / "timings.json").read_text())
+        ordered, _ = runner.plan(hosts, timings)
+        assert names(ordered[-3:]) == ["hang0", "hang1", "hang2"]
+    finally:
+        release.set()
+
+
+@needs_nornir
+def test_hung_hosts_never_exceed_max_workers(tmp_path):
+    release.clear()
+    hosts = [FakeHost(f"hang{i}") for i in range(3)] + [FakeHost(f"R{i}") for i in range(4)]
+    try:
+        _, task, result, took = run(tmp_path, hosts, min_workers=2, max_workers=2)
+        # both sessions held by hung hosts: the rest is reported, not started
+        assert took < 5, f"run took {took:.1f}s"
+        assert task.peak <= 2
+        assert sorted(result) == sorted(names(hosts))
+        assert all(result[h.name].failed for h in hosts)
+        assert isinstance(result["hang0"][0].exception, HostDeadlineExceeded)
+        assert isinstance(result["R0"][0].exception, HostNotRun)
+    finally:
+        release.set()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_plan_orders_slowest_first_and_sizes_pool()
+    test_plan_bounds()
+    test_plan_starts_timed_out_hosts_last()
+    test_workers_wanted_counts_stuck_threads()
+    if HAVE_NORNIR:
+        for test in (test_hung_hosts_do_not_stall_the_run, test_hung_hosts_never_exceed_max_workers):
+            with tempfile.TemporaryDirectory() as d:
+                test(Path(d))
+    else:
+        print("nornir not installed: run() tests skipped")
+    print("ok")
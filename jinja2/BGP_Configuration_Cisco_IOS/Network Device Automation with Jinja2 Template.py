@@ -1,7 +1,12 @@
-import yaml
+import sys
 import getpass
-from jinja2 import Template
+from pathlib import Path
 from netmiko import ConnectHandler
+
+# shared Jinja2 environments (lib/renderer.py) and cached YAML with the C loader (lib/yaml_cache.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from renderer import get_template
+from yaml_cache import load_yaml
  
 # files
 HOSTS_FILE = "hosts.yaml"
@@ -12,19 +17,16 @@ DEVICE_TYPE = "cisco_ios"   # change if needed
  
  
 # read hosts
-with open(HOSTS_FILE, "r") as f:
-    hosts = yaml.safe_load(f)["hosts"]
+hosts = load_yaml(HOSTS_FILE)["hosts"]
  
 # read data
-with open(DATA_FILE, "r") as f:
-    data = yaml.safe_load(f)
+data = load_yaml(DATA_FILE)
  
-# read template
-with open(TEMPLATE_FILE, "r") as f:
-    template_text = f.read()
+# read template (from __jinja_compiled__ if lib/build_templates.py has built it)
+template = get_template(TEMPLATE_FILE, root=".")
  
 # render config
-config_text = Template(template_text).render(**data)
+config_text = template.render(**data)
  
 print("\n=== Rendered Config ===")
 print(config_text)
@@ -48,4 +50,7 @@ for ip in hosts:
         conn.save_config()
         conn.disconnect()
  
-        print(f" Done: {ip}")
\ No newline at end of file
+        print(f" Done: {ip}")
+ 
+    except Exception as e:
+        print(f" Failed: {ip} -> {e}")
@@ -1,22 +1,25 @@
-import yaml
+import sys
 import getpass
-from jinja2 import Template
+from pathlib import Path
 from netmiko import ConnectHandler
 
-HOSTS_FILE = "hosts.yaml"
-DATA_FILE = "router_data.yaml"
-TEMPLATE_FILE = "Router_Template.j2"
+# shared Jinja2 environments (lib/renderer.py) and cached YAML (lib/yaml_cache.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from renderer import get_template
+from yaml_cache import load_yaml
+
+HOSTS_FILE = "Hosts.yaml"
+DATA_FILE = "Router_Data.yaml"
+TEMPLATE_FILE = "Config_Template.j2"
 
 DEVICE_TYPE = "cisco_ios"
 
-with open(Hosts, "r") as f:
-    hosts = yaml.safe_load(f)["hosts"]
+hosts = load_yaml(HOSTS_FILE)["hosts"]
 
-with open(DATA_FILE, "r") as f:
-    data = yaml.safe_load(f)
+data = load_yaml(DATA_FILE)
 
-with open(Config_Template, "r") as f:
-    template_text = f.read()
+# compiled once, rendered for every router
+template = get_template(TEMPLATE_FILE, root=".")
 
 username = input("Username: ").strip()
 password = getpass.getpass("Password: ")
@@ -31,7 +34,7 @@ for ip in hosts:
         "router": data["routers"][ip],
     }
 
-    config_text = Template(template_text).render(**render_vars)
+    config_text = template.render(**render_vars)
     commands = [line for line in config_text.splitlines() if line.strip()]
 
     print(f"\n=== Rendered Config for {ip} ({data['routers'][ip].get('hostname','')}) ===")
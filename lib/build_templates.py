@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Precompile the repo's Jinja2 templates into importable Python modules.
+
+For every template root below, all .j2 files are compiled with the same
+Environment options the scripts render them with, into
+<root>/__jinja_compiled__/ (one tmpl_<sha1>.py per template, loadable with
+jinja2.ModuleLoader) plus a manifest.json of the sources they came from.
+renderer.py loads from there while a template's source is unchanged, so a
+script start skips parsing and compiling; an edited template falls back to
+the .j2 file until the next build.
+
+Every template is compiled, so the build also checks them all: errors are
+listed and the exit code is 1.
+
+    python lib/build_templates.py           # build all roots
+    python lib/build_templates.py --check   # compile only, write nothing
+    python lib/build_templates.py --clean   # remove the compiled packages
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import jinja2
+from jinja2 import Environment, FileSystemLoader
+
+REPO = Path(__file__).resolve().parents[1]
+COMPILED_DIR = "__jinja_compiled__"
+MANIFEST = "manifest.json"
+
+# (template root, Environment options its renderer uses, which templates)
+TARGETS = [
+    ("pyats-lab/ZTP_Netbox", {"trim_blocks": True, "lstrip_blocks": True}, lambda n: n.startswith("templates/")),
+    ("pyats-lab/ztp/templates", {"autoescape": False}, None),
+    ("jinja2/Cisco_1921", {}, None),
+    ("jinja2/BGP_Configuration_Cisco_IOS", {}, None),
+    ("jinja2-basics/templates", {"trim_blocks": True, "lstrip_blocks": True}, None),
+    (".", {}, lambda n: "/" not in n),   # router_config.j2, switch_config.j2
+]
+
+
+def source_stamp(root, name):
+    st = os.stat(os.path.join(root, *name.split("/")))
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def build(root, options, filter_func=None, check_only=False):
+    """Compile one root. Returns (compiled names, [(name, error)])."""
+    env = Environment(loader=FileSystemLoader(root), **options)
+    names = [n for n in env.list_templates(extensions=["j2"]) if filter_func is None or filter_func(n)]
+    errors = []
+    good = []
+    for name in names:
+        try:
+            source, _, _ = env.loader.get_source(env, name)
+            env.compile(source, name)
+            good.append(name)
+        except jinja2.TemplateSyntaxError as e:
+            errors.append((name, f"line {e.lineno}: {e.message}"))
+        except Exception as e:
+            errors.append((name, f"{type(e).__name__}: {e}"))
+    if check_only:
+        return good, errors
+
+    target = os.path.join(root, COMPILED_DIR)
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+    env.compile_templates(target, zip=None, filter_func=lambda n: n in good, ignore_errors=False,
+                          log_function=lambda msg: None)
+    with open(os.path.join(target, "__init__.py"), "w") as f:
+        f.write("# generated by lib/build_templates.py, do not edit\n")
+    manifest = {
+        "jinja2": jinja2.__version__,
+        "options": options,
+        "templates": {name: source_stamp(root, name) for name in good},
+    }
+    with open(os.path.join(target, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return good, errors
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Precompile Jinja2 templates into __jinja_compiled__ packages")
+    ap.add_argument("--check", action="store_true", help="only check that every template compiles")
+    ap.add_argument("--clean", action="store_true", help="remove the compiled packages")
+    args = ap.parse_args()
+
+    failed = 0
+    for rel, options, filter_func in TARGETS:
+        root = os.path.normpath(REPO / rel)
+        if not os.path.isdir(root):
+            print(f"[SKIP] {rel}: not found")
+            continue
+        if args.clean:
+            shutil.rmtree(os.path.join(root, COMPILED_DIR), ignore_errors=True)
+            print(f"[CLEAN] {rel}")
+            continue
+        good, errors = build(root, options, filter_func, check_only=args.check)
+        where = "" if args.check else f" -> {os.path.join(rel, COMPILED_DIR)}"
+        print(f"[{'FAIL' if errors else 'OK'}] {rel}: {len(good)} compiled{where}")
+        for name, error in errors:
+            print(f"    {name}: {error}")
+        failed += len(errors)
+
+    if failed:
+        print(f"{failed} template(s) failed to compile")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
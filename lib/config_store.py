@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Deduplicated, compressed, content-addressed store for device config backups.
+
+Layout under the store root:
+
+    objects/<aa>/<sha256>           zlib-compressed blob, stored once
+    devices/<device>/<NNNNNN>.json  one small manifest per version
+
+A config is split into sections at the "!" separator lines IOS puts between
+blocks, so boilerplate shared by many devices (aaa, logging, snmp, ntp, line
+vty, ...) is stored only once no matter how many devices or versions use it.
+
+The list of section hashes is itself cut into content-defined groups (a group
+ends after any section whose hash has its low bits clear), and each group is
+stored as a blob too. Runs of shared sections therefore collapse into shared
+groups, and a version manifest only lists a handful of group hashes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+# a group of section hashes ends on average every GROUP_MASK + 1 sections
+GROUP_MASK = 0xF
+
+
+def split_sections(text: str) -> list[str]:
+    """Split a running-config into sections, each ending at a '!' line."""
+    sections = []
+    current = []
+    for line in text.splitlines(keepends=True):
+        current.append(line)
+        if line.rstrip() == "!":
+            sections.append("".join(current))
+            current = []
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def group_sections(hashes: list[str]) -> list[list[str]]:
+    """Cut a list of section hashes at content-defined boundaries."""
+    groups = []
+    current = []
+    for h in hashes:
+        current.append(h)
+        if int(h[:8], 16) & GROUP_MASK == 0:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    # unique temp name: backup.py writes from many threads, and devices share sections
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.devices_dir = self.root / "devices"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.devices_dir.mkdir(parents=True, exist_ok=True)
+        # decompressed sections are shared by many devices/versions, keep them hot
+        self._read_object = lru_cache(maxsize=4096)(self._read_object_uncached)
+
+    # ---------- objects ----------
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _write_object(self, text: str) -> str:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            _atomic_write(path, zlib.compress(raw, 9))
+        return digest
+
+    def _read_object_uncached(self, digest: str) -> str:
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    # ---------- versions ----------
+
+    def _device_dir(self, device: str) -> Path:
+        return self.devices_dir / device
+
+    def versions(self, device: str) -> list[int]:
+        """All stored version numbers for a device, oldest first."""
+        d = self._device_dir(device)
+        if not d.is_dir():
+            return []
+        return sorted(int(p.stem) for p in d.glob("*.json"))
+
+    def manifest(self, device: str, version: int = None) -> dict:
+        """Manifest of one version (latest if version is None)."""
+        versions = self.versions(device)
+        if not versions:
+            raise KeyError(f"No backups stored for device '{device}'.")
+        if version is None:
+            version = versions[-1]
+        elif version < 0:
+            if -version > len(versions):
+                raise KeyError(f"Device '{device}' has no version {version}.")
+            version = versions[version]
+        path = self._device_dir(device) / f"{version:06d}.json"
+        if not path.exists():
+            raise KeyError(f"Device '{device}' has no version {version}.")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, device: str, text: str, source: str = None) -> int:
+        """
+        Store a config for a device and return its version number.
+        If it is identical to the latest version, nothing is written.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        versions = self.versions(device)
+        if versions:
+            latest = self.manifest(device, versions[-1])
+            if latest["digest"] == digest:
+                return latest["version"]
+
+        sections = [self._write_object(s) for s in split_sections(text)]
+        tree = [self._write_object("\n".join(g)) for g in group_sections(sections)]
+        version = (versions[-1] + 1) if versions else 1
+        manifest = {
+            "device": device,
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "source": source,
+            "digest": digest,
+            "size": len(text.encode("utf-8")),
+            "tree": tree,
+        }
+        d = self._device_dir(device)
+        d.mkdir(exist_ok=True)
+        _atomic_write(d / f"{version:06d}.json", json.dumps(manifest).encode("utf-8"))
+        return version
+
+    def get(self, device: str, version: int = None) -> str:
+        """Rebuild a config. version=None is the latest, negative counts from the end."""
+        manifest = self.manifest(device, version)
+        parts = []
+        for group in manifest["tree"]:
+            parts.extend(self._read_object(h) for h in self._read_object(group).split("\n"))
+        return "".join(parts)
+
+    def devices(self) -> list[str]:
+        return sorted(p.name for p in self.devices_dir.iterdir() if p.is_dir())
+
+    def stats(self) -> dict:
+        logical = 0
+        versions = 0
+        for device in self.devices():
+            for v in self.versions(device):
+                logical += self.manifest(device, v)["size"]
+                versions += 1
+        objects = [p for p in self.objects.glob("*/*") if p.is_file()]
+        manifests = self.devices_dir.glob("*/*.json")
+        stored = sum(p.stat().st_size for p in objects) + sum(p.stat().st_size for p in manifests)
+        return {
+            "devices": len(self.devices()),
+            "versions": versions,
+            "objects": len(objects),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "ratio": round(logical / stored, 1) if stored else None,
+        }
+
+
+def open_store(root):
+    """Return a ConfigStore, or None when no store directory is configured."""
+    if not root:
+        return None
+    return ConfigStore(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicated config backup store")
+    parser.add_argument("--store", default=os.getenv("BACKUP_STORE", "store"),
+                        help="store directory (default: $BACKUP_STORE or ./store)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("put", help="add a config file as a new version")
+    p.add_argument("device")
+    p.add_argument("file")
+    p.add_argument("--source")
+
+    p = sub.add_parser("get", help="print a version of a device config")
+    p.add_argument("device")
+    p.add_argument("-v", "--version", type=int, help="version number, negative counts from the latest")
+
+    p = sub.add_parser("log", help="list stored versions of a device")
+    p.add_argument("device")
+
+    sub.add_parser("stats", help="show dedup statistics")
+
+    args = parser.parse_args()
+    store = ConfigStore(args.store)
+
+    if args.cmd == "put":
+        with open(args.file, "r", encoding="utf-8") as f:
+            version = store.put(args.device, f.read(), source=args.source or args.file)
+        print(f"{args.device} -> version {version}")
+    elif args.cmd == "get":
+        sys.stdout.write(store.get(args.device, args.version))
+    elif args.cmd == "log":
+        for v in store.versions(args.device):
+            m = store.manifest(args.device, v)
+            print(f"{v:>6}  {m['created']}  {m['digest'][:12]}  {m['size']:>8} bytes  {m.get('source') or ''}")
+    elif args.cmd == "stats":
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
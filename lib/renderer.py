@@ -0,0 +1,157 @@
+"""
+Shared Jinja2 rendering with cached environments.
+
+One Environment per (template root, options) for the whole process, so a
+template is parsed and compiled once and then reused for every device.
+Compiled templates are also kept on disk (FileSystemBytecodeCache), so the
+next run skips the compile step too. Editing a template is picked up
+automatically: auto_reload checks the file mtime, and the bytecode cache is
+keyed by the template source checksum.
+
+    from renderer import get_template, render
+
+    tpl = get_template("templates/base_router.j2", root=".", trim_blocks=True, lstrip_blocks=True)
+    cfg = render("base.j2", {"common": common, "router": router}, root="templates")
+
+template_dependencies() lists a template and its include/extends children with
+their source hashes, for tools that only re-render what changed.
+
+If lib/build_templates.py has precompiled a root (<root>/__jinja_compiled__)
+with the same options and Jinja2 version, templates are imported from there
+while their .j2 source is unchanged, so nothing is parsed or compiled at start.
+
+JINJA_CACHE_DIR sets the bytecode cache directory (default ~/.cache/netauto/jinja),
+JINJA_CACHE_DIR=off turns the on-disk cache off.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import jinja2
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader, meta
+
+from timing import span
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "netauto" / "jinja"
+COMPILED_DIR = "__jinja_compiled__"   # written by build_templates.py
+
+_envs = {}
+_lock = threading.Lock()
+
+
+def bytecode_cache():
+    cache_dir = os.environ.get("JINJA_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    if cache_dir.lower() in ("", "0", "off", "none"):
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(cache_dir)
+
+
+class CompiledLoader(BaseLoader):
+    """
+    Templates from a build_templates.py package while the .j2 file still has the
+    mtime and size it was compiled from; otherwise (and for source access) the files.
+    """
+
+    def __init__(self, root, compiled_dir, templates):
+        self.root = root
+        self.files = FileSystemLoader(root)
+        self.modules = ModuleLoader(compiled_dir)
+        self.templates = templates   # name -> {"mtime_ns", "size"}
+
+    def get_source(self, environment, template):
+        return self.files.get_source(environment, template)
+
+    def list_templates(self):
+        return self.files.list_templates()
+
+    def load(self, environment, name, globals=None):
+        stamp = self.templates.get(name)
+        if stamp is not None:
+            path = os.path.join(self.root, *name.split("/"))
+
+            def uptodate():
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    return False
+                return st.st_mtime_ns == stamp["mtime_ns"] and st.st_size == stamp["size"]
+
+            if uptodate():
+                tpl = self.modules.load(environment, name, globals)
+                # module templates never expire on their own; this makes auto_reload see edits
+                tpl._uptodate = uptodate
+                return tpl
+        return self.files.load(environment, name, globals)
+
+
+def template_loader(root, options):
+    """CompiledLoader if root has a matching precompiled package, else a FileSystemLoader."""
+    compiled_dir = os.path.join(root, COMPILED_DIR)
+    try:
+        with open(os.path.join(compiled_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return FileSystemLoader(root)
+    if manifest.get("jinja2") != jinja2.__version__ or manifest.get("options") != options:
+        return FileSystemLoader(root)
+    return CompiledLoader(root, compiled_dir, manifest.get("templates") or {})
+
+
+def get_environment(root=".", **options) -> Environment:
+    """The process-wide Environment for a template root; options are Environment() keywords."""
+    key = (os.path.realpath(root), tuple(sorted(options.items())))
+    env = _envs.get(key)
+    if env is None:
+        with _lock:
+            env = _envs.get(key)
+            if env is None:
+                env = _envs[key] = Environment(loader=template_loader(root, options),
+                                               bytecode_cache=bytecode_cache(), auto_reload=True, **options)
+    return env
+
+
+def get_template(name, root=".", **options):
+    with span("jinja.load", template=name):
+        return get_environment(root, **options).get_template(name)
+
+
+def render(name, context, root=".", **options) -> str:
+    tpl = get_template(name, root, **options)
+    with span("jinja.render", template=name):
+        return tpl.render(**context)
+
+
+def template_dependencies(name, root=".", **options) -> dict:
+    """
+    {template: sha256 of its source} for a template and everything it pulls in
+    with include/extends/import/from, recursively. A dynamic name
+    ({% include var %}) could be any template, so then every .j2 is listed.
+    """
+    env = get_environment(root, **options)
+    deps = {}
+    todo = [name]
+    while todo:
+        current = todo.pop()
+        if current in deps:
+            continue
+        source, _, _ = env.loader.get_source(env, current)
+        deps[current] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        for ref in meta.find_referenced_templates(env.parse(source)):
+            if ref is None:
+                todo.extend(env.list_templates(extensions=["j2"]))
+            else:
+                todo.append(ref)
+    return deps
+
+
+def clear():
+    """Forget the cached environments (the on-disk cache is kept)."""
+    with _lock:
+        _envs.clear()
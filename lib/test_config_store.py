@@ -0,0 +1,56 @@
+"""
+ConfigStore versions: every missing version is a KeyError, negative ones
+included, and devices sharing sections can be stored from parallel threads.
+Runs under pytest or on its own:
+
+    python test_config_store.py
+"""
+
+import threading
+
+from config_store import ConfigStore
+
+CONFIG = "hostname R1\n!\ninterface Loopback0\n ip address 1.1.1.1 255.255.255.255\n!\nend\n"
+
+
+def raises_key_error(fn, *args):
+    try:
+        fn(*args)
+    except KeyError:
+        return True
+    return False
+
+
+def test_versions_and_missing_versions(tmp_path):
+    store = ConfigStore(tmp_path)
+    assert store.put("R1", CONFIG) == 1
+    assert store.put("R1", CONFIG) == 1      # identical to latest: no new version
+    assert store.put("R1", CONFIG.replace("1.1.1.1", "1.1.1.2")) == 2
+    assert store.get("R1", 1) == CONFIG
+    assert store.get("R1", -2) == CONFIG
+    assert "1.1.1.2" in store.get("R1")
+    for version in (3, 0, -3, -9):
+        assert raises_key_error(store.get, "R1", version), version
+    assert raises_key_error(store.get, "R9")
+
+
+def test_parallel_puts(tmp_path):
+    store = ConfigStore(tmp_path)
+    configs = {f"R{i}": CONFIG.replace("hostname R1", f"hostname R{i}") for i in range(16)}
+    threads = [threading.Thread(target=store.put, args=item) for item in configs.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for device, config in configs.items():
+        assert store.get(device) == config
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_versions_and_missing_versions, test_parallel_puts):
+        with tempfile.TemporaryDirectory() as d:
+            test(Path(d))
+    print("ok")
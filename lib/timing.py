@@ -0,0 +1,193 @@
+"""
+Lightweight span timers for the device workflows.
+
+    from timing import span
+
+    with span("ssh.connect", host=name):
+        conn = ConnectHandler(**device)
+
+Timing is off unless NETAUTO_TIMING is set; until then span() returns one shared
+no-op object, so instrumented code costs a function call and nothing else.
+
+NETAUTO_TIMING is a comma separated list of sinks:
+
+    jsonl:<file>   append one JSON line per finished span
+    prom:<file>    write a Prometheus textfile (node_exporter textfile collector) at exit
+    summary        print a per-run latency breakdown to stderr at exit
+
+e.g. NETAUTO_TIMING="jsonl:timing.jsonl,summary"
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Recorder:
+    def __init__(self, spec: str):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.jsonl = None
+        self.prom_path = None
+        self.summary = False
+
+        for sink in filter(None, (s.strip() for s in spec.split(","))):
+            kind, _, arg = sink.partition(":")
+            if kind == "jsonl":
+                self.jsonl = open(arg or "timing.jsonl", "a")
+            elif kind == "prom":
+                self.prom_path = arg or "netauto_timing.prom"
+            elif kind == "summary":
+                self.summary = True
+            else:
+                raise ValueError(f"Unknown NETAUTO_TIMING sink '{sink}'")
+
+        atexit.register(self.close)
+
+    def record(self, name, labels, start, duration, parent, failed):
+        with self.lock:
+            self.durations[name].append(duration)
+            if self.jsonl:
+                self.jsonl.write(json.dumps({
+                    "run": self.run_id,
+                    "span": name,
+                    "parent": parent,
+                    "labels": labels,
+                    "start": round(start, 6),
+                    "duration": round(duration, 6),
+                    "failed": failed,
+                }) + "\n")
+
+    def breakdown(self) -> dict:
+        """{span: {count, total, mean, p50, p99, max}} for this run."""
+        out = {}
+        with self.lock:
+            items = {k: sorted(v) for k, v in self.durations.items()}
+        for name, values in items.items():
+            n = len(values)
+            out[name] = {
+                "count": n,
+                "total": sum(values),
+                "mean": sum(values) / n,
+                "p50": values[min(n - 1, round(0.50 * (n - 1)))],
+                "p99": values[min(n - 1, round(0.99 * (n - 1)))],
+                "max": values[-1],
+            }
+        return out
+
+    def write_prom(self, stats: dict) -> None:
+        lines = [
+            "# HELP netauto_span_seconds Time spent in instrumented workflow phases.",
+            "# TYPE netauto_span_seconds summary",
+        ]
+        for name, s in sorted(stats.items()):
+            lines.append(f'netauto_span_seconds{{span="{name}",quantile="0.5"}} {s["p50"]:.6f}')
+            lines.append(f'netauto_span_seconds{{span="{name}",quantile="0.99"}} {s["p99"]:.6f}')
+            lines.append(f'netauto_span_seconds_sum{{span="{name}"}} {s["total"]:.6f}')
+            lines.append(f'netauto_span_seconds_count{{span="{name}"}} {s["count"]}')
+        # write-then-rename so the textfile collector never reads a partial file
+        tmp = f"{self.prom_path}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom_path)
+
+    def print_summary(self, stats: dict) -> None:
+        if not stats:
+            return
+        print(f"\n===== TIMING BREAKDOWN (run {self.run_id}) =====", file=sys.stderr)
+        print(f"{'span':<24} {'count':>6} {'total(s)':>9} {'p50(s)':>8} {'p99(s)':>8} {'max(s)':>8}",
+              file=sys.stderr)
+        for name, s in sorted(stats.items(), key=lambda kv: kv[1]["total"], reverse=True):
+            print(f"{name:<24} {s['count']:>6} {s['total']:>9.3f} "
+                  f"{s['p50']:>8.3f} {s['p99']:>8.3f} {s['max']:>8.3f}", file=sys.stderr)
+
+    def close(self) -> None:
+        stats = self.breakdown()
+        if self.prom_path:
+            self.write_prom(stats)
+        if self.summary:
+            self.print_summary(stats)
+        if self.jsonl:
+            self.jsonl.close()
+            self.jsonl = None
+
+
+# innermost open span; a context variable so threads and asyncio tasks each see their own
+_current = contextvars.ContextVar("netauto_span", default=None)
+
+
+class _Span:
+    __slots__ = ("rec", "name", "labels", "start", "t0", "parent", "token")
+
+    def __init__(self, rec, name, labels):
+        self.rec = rec
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.token = _current.set(self.name)
+        self.start = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.t0
+        _current.reset(self.token)
+        self.rec.record(self.name, self.labels, self.start, duration, self.parent, exc_type is not None)
+        return False
+
+
+_spec = os.getenv("NETAUTO_TIMING", "").strip()
+_recorder = _Recorder(_spec) if _spec else None
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def span(name: str, **labels):
+    """Time a block: `with span("cli.send_command", host=h): ...`."""
+    if _recorder is None:
+        return _NOOP
+    return _Span(_recorder, name, labels)
+
+
+def timed(name: str):
+    """Decorator form of span() for whole functions."""
+    def deco(fn):
+        if _recorder is None:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(_recorder, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def breakdown() -> dict:
+    """Per-span latency breakdown of the current run ({} when disabled)."""
+    return _recorder.breakdown() if _recorder else {}
@@ -0,0 +1,85 @@
+"""
+Memoized YAML loading.
+
+Data files are parsed once per process with libyaml's CSafeLoader (the pure
+Python SafeLoader if PyYAML was built without libyaml). Results are cached
+by (real path, mtime, size), so an edited file is parsed again while an
+unchanged one costs a stat().
+
+Cached documents are shared between callers, so they are returned read-only:
+mappings as types.MappingProxyType, lists as tuples. Reading works as usual
+(data["routers"][serial]["hostname"], .get(), iteration, **data); use thaw()
+for a private mutable copy.
+
+    from yaml_cache import load_yaml, thaw
+
+    routers = load_yaml("devices_data.yaml")["routers"]
+    common = thaw(load_yaml("common.yaml"))   # to modify it
+"""
+
+import os
+import threading
+from types import MappingProxyType
+
+import yaml
+
+from timing import span
+
+try:
+    Loader = yaml.CSafeLoader
+except AttributeError:
+    Loader = yaml.SafeLoader
+
+_cache = {}     # realpath -> ((mtime_ns, size), frozen document)
+_lock = threading.Lock()
+stats = {"hits": 0, "loads": 0}
+
+
+def freeze(obj):
+    """Read-only view of a parsed document."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    """Mutable deep copy of a frozen document (dicts and lists again)."""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def load_yaml(path, default=None):
+    """
+    Parsed YAML file, read-only and cached. An empty file gives `default`
+    ({} if not given).
+    """
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    key = (st.st_mtime_ns, st.st_size)
+    entry = _cache.get(real)
+    if entry is not None and entry[0] == key:
+        stats["hits"] += 1
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get(real)
+        if entry is not None and entry[0] == key:
+            stats["hits"] += 1
+            return entry[1]
+        with span("yaml.load", path=path):
+            with open(real, "r", encoding="utf-8") as f:
+                data = yaml.load(f, Loader=Loader)
+        frozen = freeze(data if data is not None else ({} if default is None else default))
+        _cache[real] = (key, frozen)
+        stats["loads"] += 1
+        return frozen
+
+
+def clear():
+    with _lock:
+        _cache.clear()
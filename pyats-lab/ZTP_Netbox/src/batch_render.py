@@ -0,0 +1,180 @@
+"""
+Render day-0 configs for a whole inventory (or a filtered part of it) in one go.
+
+The inventory is loaded once and every host's template/context is built in
+this process; rendering then runs in a process pool, one <out>/<device>.cfg
+per host. A host that fails is collected and reported at the end (and in
+<out>/errors.txt), it does not stop the run.
+
+Runs are incremental: <out>/.render_manifest.json (render_manifest.py) keeps
+the hashes each config was rendered from, and only hosts whose template tree,
+common data or own context changed are rendered again (--force renders all).
+
+Run from the ZTP_Netbox folder (paths in datas/ are relative to it):
+
+    python src/batch_render.py                                  # every host
+    python src/batch_render.py --hosts R1,R2 --out day0
+    python src/batch_render.py --filter site=ams1 --filter role=edge --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import urllib3
+from nornir import InitNornir
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lib"))
+from timing import span
+from yaml_cache import load_yaml, thaw
+
+from render import build_context, render_template
+from render_manifest import RenderManifest, device_inputs, digest
+
+# errors printed at the end of the run; all of them go to <out>/errors.txt
+MAX_ERRORS_SHOWN = 20
+
+
+def host_matches(host, key: str, value: str) -> bool:
+    """key=value against host data or attributes; NetBox objects ({"slug", "name"}) match either."""
+    current = getattr(host, key, None)
+    if current is None:
+        current = host.get(key)
+    if isinstance(current, dict):
+        return value in (current.get("slug"), current.get("name"), str(current.get("id")))
+    return current is not None and str(current) == value
+
+
+def select_hosts(nr, names=None, filters=()):
+    hosts = nr.inventory.hosts
+    if names:
+        missing = [n for n in names if n not in hosts]
+        if missing:
+            raise ValueError(f"not in the inventory: {', '.join(missing)}")
+        selected = [hosts[n] for n in names]
+    else:
+        selected = list(hosts.values())
+    for key, value in filters:
+        selected = [h for h in selected if host_matches(h, key, value)]
+    return selected
+
+
+def render_job(job):
+    """
+    Runs in a worker process: (name, template, context, out_dir) ->
+    (name, template, length of the rendered config or None, error).
+    """
+    name, template_path, context, out_dir = job
+    try:
+        rendered = render_template(template_path, context, name)
+        path = Path(out_dir) / f"{name}.cfg"
+        path.write_text(rendered, encoding="utf-8")
+        return name, template_path, len(rendered), None
+    except Exception as e:
+        return name, template_path, None, f"{type(e).__name__}: {e}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render configs for every host in the Nornir/NetBox inventory")
+    ap.add_argument("--config", default="config/nornir.yaml", help="Nornir config file")
+    ap.add_argument("--out", default="rendered", help="output directory (<out>/<device>.cfg)")
+    ap.add_argument("--hosts", help="comma separated host names (default: all)")
+    ap.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE",
+                    help="keep hosts whose data/attribute KEY equals VALUE, e.g. site=ams1 (repeatable)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="render processes")
+    ap.add_argument("--force", action="store_true", help="render every selected host, changed or not")
+    args = ap.parse_args()
+
+    filters = []
+    for f in args.filter:
+        key, sep, value = f.partition("=")
+        if not sep:
+            ap.error(f"--filter expects KEY=VALUE, got '{f}'")
+        filters.append((key, value))
+
+    with span("nornir.init"):
+        nr = InitNornir(config_file=args.config)
+    try:
+        hosts = select_hosts(nr, args.hosts.split(",") if args.hosts else None, filters)
+    except ValueError as e:
+        ap.error(str(e))
+
+    template_map = load_yaml("datas/template_map.yaml")
+    # plain dicts, so digest() hashes the data and not the read-only wrappers
+    common_cfg = thaw(load_yaml("datas/common.yaml"))
+    os.makedirs(args.out, exist_ok=True)
+
+    manifest = RenderManifest(args.out)
+    common_hash = digest(common_cfg)
+
+    errors = {}
+    jobs = []
+    pending = {}      # host -> render inputs, recorded in the manifest once rendered
+    affected = {}     # reason -> [host]
+    for h in hosts:
+        try:
+            template_path, context = build_context(h, template_map, common_cfg)
+        except Exception as e:
+            errors[h.name] = f"context: {type(e).__name__}: {e}"
+            manifest.forget(h.name)
+            continue
+        try:
+            inputs = manifest.inputs(template_path, common_hash, digest(device_inputs(h, template_path)))
+        except Exception as e:
+            errors[h.name] = f"{type(e).__name__}: {e}"
+            manifest.forget(h.name)
+            continue
+        reasons = ["forced"] if args.force else manifest.reasons(h.name, inputs)
+        if not reasons:
+            continue
+        affected.setdefault(", ".join(reasons), []).append(h.name)
+        pending[h.name] = inputs
+        jobs.append((h.name, template_path, context, args.out))
+
+    for reason, names in sorted(affected.items()):
+        print(f"{reason} ({len(names)}): {', '.join(names)}")
+    print(f"{len(hosts) - len(jobs) - len(errors)} of {len(hosts)} hosts up to date")
+
+    start = time.perf_counter()
+    rendered = 0
+    by_template = {}
+    if jobs:
+        print(f"Rendering {len(jobs)} hosts with {args.workers} workers into {args.out}/")
+        chunksize = max(1, len(jobs) // (args.workers * 4))
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for name, template_path, size, error in pool.map(render_job, jobs, chunksize=chunksize):
+                if error:
+                    errors[name] = error
+                    manifest.forget(name)
+                    continue
+                manifest.record(name, pending[name])
+                rendered += 1
+                by_template[template_path] = by_template.get(template_path, 0) + 1
+    elapsed = time.perf_counter() - start
+    manifest.save()
+
+    for template_path, n in sorted(by_template.items()):
+        print(f"  {template_path}: {n}")
+    rate = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {rendered} configs in {elapsed:.2f}s ({rate:.0f} renders/s), {len(errors)} errors")
+    errors_file = os.path.join(args.out, "errors.txt")
+    if not errors and os.path.exists(errors_file):
+        os.remove(errors_file)   # left over from an earlier run
+    if errors:
+        lines = [f"{name}: {error}" for name, error in sorted(errors.items())]
+        with open(errors_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        for line in lines[:MAX_ERRORS_SHOWN]:
+            print(f"  [ERROR] {line}")
+        if len(lines) > MAX_ERRORS_SHOWN:
+            print(f"  ... {len(lines) - MAX_ERRORS_SHOWN} more in {errors_file}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
+
 from pyats.topology import loader
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lib"))
+from timing import span
+
 def get_serial(ip: str, username: str, password: str, os: str = "iosxe") -> str:
     tb = {
         "testbed": {"name": "ztp"},
@@ -33,9 +39,11 @@ def get_serial(ip: str, username: str, password: str, os: str = "iosxe") -> str:
     dev = testbed.devices["dut"]
 
     
-    dev.connect(log_stdout=True)
+    with span("ssh.connect", host=ip):
+        dev.connect(log_stdout=True)
 
-    out = dev.execute("show version")
+    with span("cli.execute", host=ip, command="show version"):
+        out = dev.execute("show version")
     dev.disconnect()
 
     serial = None
@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import urllib3 #for disabling the SSL errors if we want to use netbox API
 from nornir import InitNornir  #to creat an object for nornir and load inventory (from netbox in this case)
 
@@ -7,6 +10,9 @@ from get_serial_pyats import get_serial
 from render import render_config
 from push import push_rendered_config
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lib"))
+from timing import span
+
 
 def find_device_by_serial(nr, serial: str) -> str:
     serial = serial.strip()
@@ -33,7 +39,8 @@ def main():
     print("Serial:", serial)
 
     print("\n[2] Loading NetBox inventory via Nornir...")
-    nr = InitNornir(config_file="config/nornir.yaml")
+    with span("nornir.init"):
+        nr = InitNornir(config_file="config/nornir.yaml")
 
     print("\n[3] Matching serial to NetBox device...")
     device_name = find_device_by_serial(nr, serial)
@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
+
 from nornir_netmiko.tasks import netmiko_send_config, netmiko_send_command
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lib"))
+from timing import span
+
 def push_rendered_config(nr, device_name: str, rendered_cfg: str):
     nr2 = nr.filter(name=device_name)
 
@@ -23,4 +29,5 @@ def push_rendered_config(nr, device_name: str, rendered_cfg: str):
         task.run(task=netmiko_send_command, command_string="show run | section router bgp")
         task.run(task=netmiko_send_command, command_string="show run | i ^ip domain name|^ip name-server|^ntp server|^logging host|^snmp-server")
 
-    return nr2.run(task=_task)
+    with span("nornir.run", host=device_name):
+        return nr2.run(task=_task)
@@ -1,44 +1,42 @@
-import yaml
-from jinja2 import Environment, FileSystemLoader
+import sys
+from pathlib import Path
 
+# span timers (lib/timing.py), the shared Jinja2 environments (lib/renderer.py)
+# and cached read-only YAML (lib/yaml_cache.py): datas/*.yaml are parsed once per process
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lib"))
+from timing import span
+from renderer import get_template
+from yaml_cache import load_yaml, thaw
 
-def load_yaml(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
 
+def select_template(template_map: dict, dt_slug: str) -> str:
+    return (
+        (template_map.get("device_type_slug_map") or {}).get(dt_slug)
+        or template_map.get("default")
+        or "templates/base_router.j2"
+    )
 
-def render_config(nr, device_name: str, debug: bool = False) -> tuple[str, str]:
+
+def build_context(host, template_map: dict, common_cfg: dict, debug: bool = False) -> tuple[str, dict]:
     """
-    Render config for a device using:
-      - NetBox config_context from Nornir inventory
-      - common YAML (datas/common.yaml)
-      - template_map (datas/template_map.yaml)
+    Template and render context for one Nornir host: NetBox config_context
+    plus the common YAML. common_cfg may be read-only load_yaml() data; the
+    context is made of plain dicts and lists, so it can be pickled, dumped or
+    changed by the caller.
 
     Returns:
-      (template_path, rendered_config)
+      (template_path, context)
     """
-    if device_name not in nr.inventory.hosts:
-        raise ValueError(f"Device '{device_name}' not found in Nornir inventory.")
-
-    h = nr.inventory.hosts[device_name]
-
-    cc = h.data.get("config_context") or {}
-    device_type = h.data.get("device_type") or {}
+    cc = host.data.get("config_context") or {}
+    device_type = host.data.get("device_type") or {}
     dt_slug = (device_type.get("slug") or "").strip()
 
-    template_map = load_yaml("datas/template_map.yaml")
-    template_path = (
-        (template_map.get("device_type_slug_map") or {}).get(dt_slug)
-        or template_map.get("default")
-        or "templates/base_router.j2"
-    )
-
-    common_cfg = load_yaml("datas/common.yaml")  # expects {"common": {...}}
+    template_path = select_template(template_map, dt_slug)
 
     context = {
-        "device": {"name": h.name, "serial": h.data.get("serial")},
-        **common_cfg,  # provides "common"
-        **cc,          # provides "router", "dns", "ntp", ...
+        "device": {"name": host.name, "serial": host.data.get("serial")},
+        **thaw(common_cfg),  # provides "common"
+        **thaw(cc),          # provides "router", "dns", "ntp", ...
     }
 
     if debug:
@@ -48,8 +46,31 @@ def render_config(nr, device_name: str, debug: bool = False) -> tuple[str, str]:
         print("DEBUG netbox cc keys:", list(cc.keys()))
         print("DEBUG context keys:", list(context.keys()))
 
-    env = Environment(loader=FileSystemLoader("."), trim_blocks=True, lstrip_blocks=True)
-    tpl = env.get_template(template_path)
-    rendered = tpl.render(**context)
+    return template_path, context
+
+
+def render_template(template_path: str, context: dict, device_name: str = None) -> str:
+    # one cached environment for all devices; the template is compiled once per process
+    tpl = get_template(template_path, root=".", trim_blocks=True, lstrip_blocks=True)
+    with span("jinja.render", host=device_name, template=template_path):
+        return tpl.render(**context)
+
+
+def render_config(nr, device_name: str, debug: bool = False) -> tuple[str, str]:
+    """
+    Render config for a device using:
+      - NetBox config_context from Nornir inventory
+      - common YAML (datas/common.yaml)
+      - template_map (datas/template_map.yaml)
+
+    Returns:
+      (template_path, rendered_config)
+    """
+    if device_name not in nr.inventory.hosts:
+        raise ValueError(f"Device '{device_name}' not found in Nornir inventory.")
+
+    template_map = load_yaml("datas/template_map.yaml")
+    common_cfg = load_yaml("datas/common.yaml")  # expects {"common": {...}}
 
-    return template_path, rendered
+    template_path, context = build_context(nr.inventory.hosts[device_name], template_map, common_cfg, debug)
+    return template_path, render_template(template_path, context, device_name)
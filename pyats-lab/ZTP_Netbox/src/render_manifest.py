@@ -0,0 +1,102 @@
+"""
+What every rendered config was built from, so batch_render.py can skip the
+ones whose inputs did not change.
+
+<out>/.render_manifest.json:
+
+    {"version": 1,
+     "templates": {"templates/base_router.j2": {"templates/base_router.j2": sha, <included>: sha}},
+     "devices":   {"R1": {"template": path, "template_hash": sha, "common": sha, "context": sha}}}
+
+- template_hash covers the template and its include/extends children (renderer.template_dependencies)
+- common is datas/common.yaml as loaded, context the host's own data (NetBox config_context, name, serial)
+"""
+
+import hashlib
+import json
+import os
+
+from renderer import template_dependencies
+
+MANIFEST = ".render_manifest.json"
+VERSION = 1
+
+
+def digest(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def device_inputs(host, template_path: str) -> dict:
+    """The per-device part of the render inputs (common data is tracked separately)."""
+    return {
+        "name": host.name,
+        "serial": host.data.get("serial"),
+        "config_context": host.data.get("config_context"),
+        "template": template_path,
+    }
+
+
+class RenderManifest:
+    def __init__(self, out_dir: str):
+        self.path = os.path.join(out_dir, MANIFEST)
+        self.out_dir = out_dir
+        self.templates = {}     # template -> {dependency: sha}, for this run
+        self.devices = {}
+        self.old_templates = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VERSION:
+                self.devices = data.get("devices") or {}
+                self.old_templates = data.get("templates") or {}
+        except (OSError, ValueError):
+            pass
+
+    def template(self, template_path: str) -> str:
+        """Hash of a template and its children, computed once per run."""
+        if template_path not in self.templates:
+            self.templates[template_path] = template_dependencies(
+                template_path, root=".", trim_blocks=True, lstrip_blocks=True)
+        return digest(self.templates[template_path])
+
+    def changed_templates(self, template_path: str):
+        """Which files of a template's tree differ from the last run."""
+        old = self.old_templates.get(template_path) or {}
+        new = self.templates.get(template_path) or {}
+        return sorted(n for n in set(old) | set(new) if old.get(n) != new.get(n))
+
+    def inputs(self, template_path, common_hash, context_hash) -> dict:
+        return {"template": template_path, "template_hash": self.template(template_path),
+                "common": common_hash, "context": context_hash}
+
+    def reasons(self, name: str, inputs: dict):
+        """Why a device needs rendering: [] if its output is up to date."""
+        old = self.devices.get(name)
+        if old is None:
+            return ["new"]
+        reasons = []
+        if old.get("template") != inputs["template"]:
+            reasons.append(f"template {old.get('template')} -> {inputs['template']}")
+        elif old.get("template_hash") != inputs["template_hash"]:
+            changed = self.changed_templates(inputs["template"])
+            reasons.append(f"template {', '.join(changed) or inputs['template']}")
+        if old.get("common") != inputs["common"]:
+            reasons.append("common data")
+        if old.get("context") != inputs["context"]:
+            reasons.append("device context")
+        if not reasons and not os.path.exists(os.path.join(self.out_dir, f"{name}.cfg")):
+            reasons.append("output missing")
+        return reasons
+
+    def record(self, name: str, inputs: dict):
+        self.devices[name] = inputs
+
+    def forget(self, name: str):
+        self.devices.pop(name, None)
+
+    def save(self):
+        templates = dict(self.old_templates, **self.templates)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "templates": templates, "devices": self.devices}, f, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -0,0 +1,351 @@
+"""
+Feature extractors for baseline compliance.
+
+A feature turns a device's running-config into a flat {key: value} map, e.g.
+VLAN id -> name or NTP server -> options. Every feature is diffed with the same
+compare(): keys only on one side are missing/extra, keys on both sides with
+different values are mismatches.
+
+Extractors work on the config lines collected once per device, so checking
+another feature costs a few regexes, not another pass over the fleet.
+Register new ones with @feature:
+
+    @feature("dns", "DNS servers")
+    def dns_servers(lines):
+        return {m.group(1): "" for m in map(DNS.match, lines) if m}
+"""
+
+import hashlib
+import re
+
+FEATURES = {}
+
+
+class Feature:
+    def __init__(self, name, title, extract, mismatch_label=None):
+        self.name = name
+        self.title = title
+        self.extract = extract
+        self.mismatch_label = mismatch_label or f"{title} mismatches"
+
+
+def feature(name, title, mismatch_label=None):
+    def register(fn):
+        FEATURES[name] = Feature(name, title, fn, mismatch_label)
+        return fn
+    return register
+
+
+def select(names):
+    """Features from a comma separated list ("vlans,ntp" or "all")."""
+    if names == "all":
+        return list(FEATURES.values())
+    unknown = [n for n in names.split(",") if n not in FEATURES]
+    if unknown:
+        raise ValueError(f"unknown feature(s): {', '.join(unknown)} (known: {', '.join(FEATURES)})")
+    return [FEATURES[n] for n in names.split(",")]
+
+
+def compare(baseline, device):
+    """(missing keys, extra keys, [(key, baseline value, device value)]) of two {key: value} maps."""
+    b_ids = set(baseline.keys())
+    d_ids = set(device.keys())
+
+    missing = sorted(b_ids - d_ids)
+    extra = sorted(d_ids - b_ids)
+
+    mismatched = []
+    for key in sorted(b_ids & d_ids):
+        if (baseline.get(key) or "") != (device.get(key) or ""):
+            mismatched.append((key, baseline.get(key), device.get(key)))
+
+    return missing, extra, mismatched
+
+
+def digest(value) -> bytes:
+    return hashlib.blake2b(str(value or "").encode(), digest_size=8).digest()
+
+
+class Baseline:
+    """
+    A site baseline, extracted and hashed once; members are checked against
+    the hashes, so a mismatch is one set difference and a digest compare per key.
+    """
+
+    def __init__(self, name, features_data):
+        self.name = name
+        self.values = features_data
+        self.hashes = {f: {k: digest(v) for k, v in data.items()} for f, data in features_data.items()}
+
+    def check(self, member):
+        """{feature: (missing, extra, mismatched)} for one member's extracted features."""
+        result = {}
+        for name, hashes in self.hashes.items():
+            data = member.get(name) or {}
+            missing, extra, mismatched = compare(hashes, {k: digest(v) for k, v in data.items()})
+            result[name] = (missing, extra,
+                            [(key, self.values[name][key], data[key]) for key, _, _ in mismatched])
+        return result
+
+
+# ---------- secrets ----------
+
+# key/password/secret/community values, with an optional encryption type: 0 is
+# clear text, 5/7/8/9 are salted, so two devices with the same secret show
+# different strings and the value itself cannot be compared.
+# ("key <id>" on ntp server lines is a key number, not a secret: not masked there)
+SECRET = re.compile(r"\b(key|password|secret|community)( [05789])? (\S+)")
+
+
+def mask_secrets(line: str) -> str:
+    def repl(m):
+        kind, enc, value = m.group(1), (m.group(2) or "").strip(), m.group(3)
+        if enc and enc != "0":
+            return f"{kind} {enc} <encrypted>"
+        return f"{kind} <sha:{hashlib.sha256(value.encode()).hexdigest()[:8]}>"
+    return SECRET.sub(repl, line)
+
+
+def instance_key(keyword, rest, key_words):
+    """
+    (key, value) for a "<keyword> <rest>" line. Statements that can appear
+    several times (snmp-server user ADMIN / user OPS) are told apart by the
+    words naming the instance: key_words maps keyword -> how many of them.
+    """
+    words = rest.split()
+    n = key_words.get(keyword, 0)
+    return " ".join([keyword] + words[:n]), " ".join(words[n:])
+
+
+def stanzas(lines, header):
+    """(header match, [child lines]) for every top-level stanza whose first line matches `header`."""
+    current = None
+    for line in lines:
+        if current is not None and line.startswith(" "):
+            current[1].append(line.rstrip())
+            continue
+        if current is not None:
+            yield current
+            current = None
+        m = header.match(line)
+        if m:
+            current = (m, [])
+    if current is not None:
+        yield current
+
+
+# ---------- VLANs ----------
+
+# "vlan 10" / "vlan 10,20-22" starts a VLAN stanza; "vlan internal ...", "vlan dot1q ..." do not
+CONFIG_VLAN = re.compile(r"^vlan ([\d,\-]+)\s*$")
+CONFIG_NAME = re.compile(r"^\s+name (.+?)\s*$")
+
+
+def expand_vlan_range(spec: str):
+    ids = []
+    for part in spec.split(","):
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            ids.append(int(part))
+    return ids
+
+
+@feature("vlans", "VLANs", "VLAN name mismatches")
+def parse_vlans_from_config(lines):
+    """
+    Streaming parser for the VLAN stanzas of a running-config.
+    Takes any iterable of lines (an open file works) and keeps no more than the current stanza.
+    VLANs without a 'name' get the IOS default name, VLAN0010 style, like 'show vlan brief' shows them.
+    Returns: { vlan_id(int): vlan_name(str) }
+    """
+    vlans = {}
+    current = []
+    for line in lines:
+        m = CONFIG_VLAN.match(line)
+        if m:
+            current = expand_vlan_range(m.group(1))
+            for vid in current:
+                vlans.setdefault(vid, f"VLAN{vid:04d}")
+            continue
+        if not current:
+            continue
+        m = CONFIG_NAME.match(line)
+        if m and len(current) == 1:
+            vlans[current[0]] = m.group(1).strip('"')
+        elif not line.startswith(" "):
+            current = []
+    return vlans
+
+
+# ---------- NTP ----------
+
+NTP_SERVER = re.compile(r"^ntp (server|peer) (?:vrf (\S+) )?(\S+)(.*)$")
+
+
+@feature("ntp", "NTP servers")
+def ntp_servers(lines):
+    """
+    {"server 10.0.0.1": "key 1 prefer source Loopback0"}; a vrf is part of the key.
+    Options are kept as they are: "key <id>" names an ntp authentication-key.
+    """
+    servers = {}
+    for line in lines:
+        m = NTP_SERVER.match(line)
+        if m:
+            kind, vrf, host, options = m.groups()
+            key = f"{kind} vrf {vrf} {host}" if vrf else f"{kind} {host}"
+            servers[key] = options.strip()
+    return servers
+
+
+# ---------- AAA / TACACS ----------
+
+# method lists: "aaa authentication login default group TACACS local" -> key up to the list name
+AAA_METHOD = re.compile(r"^(aaa (?:authentication|authorization|accounting) \S+ \S+) (.+?)\s*$")
+AAA_GROUP = re.compile(r"^(aaa group server \S+ \S+)\s*$")
+AAA_LINE = re.compile(r"^(aaa \S.*?)\s*$")
+TACACS_HOST = re.compile(r"^(tacacs-server host \S+)(.*)$")
+TACACS_SERVER = re.compile(r"^(tacacs server \S+)\s*$")
+TACACS_LINE = re.compile(r"^(tacacs-server (?!host)\S+)(.*)$")
+
+
+@feature("aaa", "AAA/TACACS lines")
+def aaa_lines(lines):
+    """
+    Method lists keyed by type and list name, server groups and 'tacacs server'
+    stanzas keyed by name with their sorted member lines as value, other aaa
+    lines as they are. Keys are masked.
+    """
+    lines = list(lines)
+    found = {}
+    for m, children in stanzas(lines, AAA_GROUP):
+        found[m.group(1)] = "; ".join(sorted(c.strip() for c in children))
+    for m, children in stanzas(lines, TACACS_SERVER):
+        found[m.group(1)] = "; ".join(sorted(mask_secrets(c.strip()) for c in children))
+    for line in lines:
+        if AAA_GROUP.match(line):
+            continue
+        m = AAA_METHOD.match(line) or TACACS_HOST.match(line) or TACACS_LINE.match(line)
+        if m:
+            found[m.group(1)] = mask_secrets(m.group(2).strip())
+            continue
+        m = AAA_LINE.match(line)
+        if m:
+            found[m.group(1)] = ""
+    return found
+
+
+# ---------- SNMP ----------
+
+SNMP_COMMUNITY = re.compile(r"^snmp-server community (\S+)(.*)$")
+SNMP_HOST = re.compile(r"^snmp-server host (\S+)(.*)$")
+# v1/v2c trap hosts carry the community right after the version
+SNMP_HOST_COMMUNITY = re.compile(r"\b(version (?:1|2c) )(\S+)")
+SNMP_LINE = re.compile(r"^snmp-server (\S+)(.*)$")
+# v3 user auth/priv passwords
+SNMP_USER_SECRET = re.compile(r"\b(auth (?:md5|sha)|priv (?:des|3des|aes \d+)) (\S+)")
+# per-device by nature
+SNMP_IGNORE = ("location", "contact", "chassis-id", "engineID")
+# statements that can appear more than once, and how many words name each one
+SNMP_KEY_WORDS = {"user": 1, "group": 2, "view": 2}   # user <name>, group <name> <model>, view <name> <oid>
+
+
+@feature("snmp", "SNMP settings")
+def snmp_settings(lines):
+    """
+    Communities (masked), trap hosts, users/groups/views by name and the
+    other snmp-server lines by keyword.
+    """
+    found = {}
+    for line in lines:
+        if not line.startswith("snmp-server "):
+            continue
+        m = SNMP_COMMUNITY.match(line)
+        if m:
+            found[mask_secrets(f"community {m.group(1)}")] = m.group(2).strip()
+            continue
+        m = SNMP_HOST.match(line)
+        if m:
+            options = SNMP_HOST_COMMUNITY.sub(lambda c: c.group(1) + mask_secrets(f"community {c.group(2)}"),
+                                              m.group(2).strip())
+            found[f"host {m.group(1)}"] = options
+            continue
+        m = SNMP_LINE.match(line)
+        if m and m.group(1) not in SNMP_IGNORE:
+            # "enable traps <type>" lines are keyed whole, everything else by its keyword
+            if m.group(1) == "enable":
+                found[line.strip()] = ""
+            else:
+                key, value = instance_key(m.group(1), m.group(2), SNMP_KEY_WORDS)
+                found[key] = SNMP_USER_SECRET.sub(lambda s: f"{s.group(1)} <masked>", value)
+    return found
+
+
+# ---------- logging ----------
+
+LOGGING_HOST = re.compile(r"^logging (?:host )?(?:vrf (\S+) )?(\d{1,3}(?:\.\d{1,3}){3}|[\w.-]+\.[a-z]{2,})(.*)$")
+LOGGING_LINE = re.compile(r"^logging (\S+)(.*)$")
+LOGGING_KEY_WORDS = {"discriminator": 1}   # discriminator <name>
+
+
+@feature("logging", "logging settings")
+def logging_hosts(lines):
+    """
+    {"host 192.168.199.50": "transport udp port 514"}, discriminators by name and
+    the other logging settings by keyword.
+    """
+    found = {}
+    for line in lines:
+        m = LOGGING_HOST.match(line)
+        if m:
+            vrf, host, options = m.groups()
+            found[f"host vrf {vrf} {host}" if vrf else f"host {host}"] = options.strip()
+            continue
+        m = LOGGING_LINE.match(line)
+        if m:
+            key, value = instance_key(m.group(1), m.group(2), LOGGING_KEY_WORDS)
+            found[key] = value
+    return found
+
+
+# ---------- BGP ----------
+
+ROUTER_BGP = re.compile(r"^router bgp (\S+)\s*$")
+BGP_NEIGHBOR = re.compile(r"^\s+neighbor (\S+) (.+?)\s*$")
+BGP_AF = re.compile(r"^\s+address-family (.+?)\s*$")
+
+
+@feature("bgp", "BGP neighbors")
+def bgp_neighbors(lines):
+    """
+    {"neighbor 192.0.2.1": "remote-as 65000; [ipv4] activate"} - every neighbor
+    line of the router bgp stanza, address-family lines tagged with the family.
+    """
+    found = {}
+    for m, children in stanzas(lines, ROUTER_BGP):
+        found["router bgp"] = m.group(1)
+        neighbors = {}
+        family = None
+        for line in children:
+            af = BGP_AF.match(line)
+            if af:
+                family = af.group(1)
+                continue
+            if line.strip() == "exit-address-family":
+                family = None
+                continue
+            n = BGP_NEIGHBOR.match(line)
+            if n:
+                setting = mask_secrets(n.group(2))
+                neighbors.setdefault(n.group(1), []).append(f"[{family}] {setting}" if family else setting)
+        for peer, settings in neighbors.items():
+            found[f"neighbor {peer}"] = "; ".join(sorted(settings))
+    return found
+
+
+def extract(lines, features):
+    """{feature name: {key: value}} for the selected features from one config."""
+    lines = [line.rstrip("\r\n") for line in lines]
+    return {f.name: f.extract(lines) for f in features}
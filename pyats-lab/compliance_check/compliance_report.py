@@ -0,0 +1,162 @@
+"""
+Machine-readable compliance reports.
+
+One record per checked device, written and flushed as soon as the device is
+checked, so a report of a large fleet never sits in memory:
+
+    JSON Lines  {"type": "device", "run", "site", "baseline", "device", "status", "error",
+                 "features": {"ntp": {"missing": [[key, value]], "extra": [...], "mismatched": [[key, baseline, device]]}}}
+                {"type": "site", "run", "site", "baseline", "devices", "compliant", "failing", "errors", "features": {...}}
+    CSV         run,site,device,feature,change,key,baseline,device_value   one row per difference
+                (change ok/missing/extra/mismatch/error), plus <name>_sites.csv with the site rollup
+
+A previous JSON Lines report can be diffed against the current run
+(load_previous() + changes()), which only keeps per-device fingerprints.
+"""
+
+import csv
+import json
+from collections import Counter
+from pathlib import Path
+
+STATUS_OK = "ok"
+STATUS_FAIL = "fail"
+STATUS_ERROR = "error"
+
+
+def device_record(run, site, baseline, device, result=None, baseline_data=None, dev_data=None, error=None):
+    """Report record for one device from Baseline.check() output (or an error)."""
+    record = {"type": "device", "run": run, "site": site, "baseline": baseline, "device": device,
+              "status": STATUS_ERROR if error else STATUS_OK, "error": str(error) if error else None,
+              "features": {}}
+    for name, (missing, extra, mismatched) in (result or {}).items():
+        if missing or extra or mismatched:
+            record["status"] = STATUS_FAIL
+        record["features"][name] = {
+            "missing": [[key, baseline_data[name].get(key)] for key in missing],
+            "extra": [[key, dev_data[name].get(key)] for key in extra],
+            "mismatched": [list(m) for m in mismatched],
+        }
+    return record
+
+
+def fingerprint(record):
+    """(status, {(feature, change, key)}) - what --diff-previous compares."""
+    items = set()
+    for name, diff in record.get("features", {}).items():
+        for change in ("missing", "extra", "mismatched"):
+            for entry in diff.get(change, []):
+                items.add((name, change, str(entry[0])))
+    return record["status"], items
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8")
+
+    def device(self, record):
+        self.f.write(json.dumps(record) + "\n")
+        self.f.flush()
+
+    def site(self, summary):
+        self.device(summary)
+
+    def close(self):
+        self.f.close()
+
+
+class CsvWriter:
+    FIELDS = ["run", "site", "device", "feature", "change", "key", "baseline", "device_value"]
+    SITE_FIELDS = ["run", "site", "baseline", "devices", "compliant", "failing", "errors", "failing_features"]
+
+    def __init__(self, path):
+        path = Path(path)
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.rows = csv.writer(self.f)
+        self.rows.writerow(self.FIELDS)
+        self.sites_f = open(path.with_name(f"{path.stem}_sites{path.suffix}"), "w", newline="", encoding="utf-8")
+        self.sites = csv.writer(self.sites_f)
+        self.sites.writerow(self.SITE_FIELDS)
+
+    def device(self, r):
+        head = [r["run"], r["site"], r["device"]]
+        if r["status"] == STATUS_ERROR:
+            self.rows.writerow(head + ["", "error", "", "", r["error"]])
+        elif r["status"] == STATUS_OK:
+            self.rows.writerow(head + ["", "ok", "", "", ""])
+        for name, diff in r["features"].items():
+            for key, value in diff["missing"]:
+                self.rows.writerow(head + [name, "missing", key, value, ""])
+            for key, value in diff["extra"]:
+                self.rows.writerow(head + [name, "extra", key, "", value])
+            for key, bvalue, dvalue in diff["mismatched"]:
+                self.rows.writerow(head + [name, "mismatch", key, bvalue, dvalue])
+        self.f.flush()
+
+    def site(self, s):
+        failing = ";".join(f"{name}={n}" for name, n in s["features"].items() if n)
+        self.sites.writerow([s["run"], s["site"], s["baseline"], s["devices"], s["compliant"],
+                             s["failing"], s["errors"], failing])
+        self.sites_f.flush()
+
+    def close(self):
+        self.f.close()
+        self.sites_f.close()
+
+
+class SiteRollup:
+    """Running per-site counts; only numbers are kept, not the records."""
+
+    def __init__(self, run, site, baseline, features):
+        self.run, self.site, self.baseline = run, site, baseline
+        self.status = Counter()
+        self.features = Counter({name: 0 for name in features})
+
+    def add(self, record):
+        self.status[record["status"]] += 1
+        for name, diff in record["features"].items():
+            if diff["missing"] or diff["extra"] or diff["mismatched"]:
+                self.features[name] += 1
+
+    def summary(self):
+        return {"type": "site", "run": self.run, "site": self.site, "baseline": self.baseline,
+                "devices": sum(self.status.values()), "compliant": self.status[STATUS_OK],
+                "failing": self.status[STATUS_FAIL], "errors": self.status[STATUS_ERROR],
+                "features": dict(self.features)}
+
+
+def load_previous(path):
+    """{device: fingerprint} from a JSON Lines report, read line by line."""
+    previous = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("type") == "device":
+                previous[record["device"]] = fingerprint(record)
+    return previous
+
+
+def changes(previous, current):
+    """
+    Compliance changes between two runs, from {device: fingerprint} maps:
+    [(device, text)] for new/resolved differences, status changes and devices
+    that appeared or disappeared.
+    """
+    out = []
+    for device in sorted(set(previous) | set(current)):
+        if device not in previous:
+            out.append((device, f"new device, {current[device][0]}"))
+            continue
+        if device not in current:
+            out.append((device, "no longer checked"))
+            continue
+        (old_status, old_items), (new_status, new_items) = previous[device], current[device]
+        if old_status != new_status:
+            out.append((device, f"status {old_status} -> {new_status}"))
+        for name, change, key in sorted(new_items - old_items):
+            out.append((device, f"new:      {name} {change} {key}"))
+        for name, change, key in sorted(old_items - new_items):
+            out.append((device, f"resolved: {name} {change} {key}"))
+    return out
@@ -1,19 +1,73 @@
 #!/usr/bin/env python3
 
 import re
+import sys
+import argparse
 from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from pyats.topology import loader
 from genie.metaparser.util.exceptions import SchemaEmptyParserError
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from timing import span
+
+from compliance_features import Baseline, extract, select
+from compliance_report import (STATUS_ERROR, STATUS_OK, CsvWriter, JsonlWriter, SiteRollup, changes,
+                               device_record, fingerprint, load_previous)
+
+
+VLAN_STATES = r"active|act/lshut|act/ishut|act/unsup|sus/lshut|sus/ishut|suspended|suspend"
+
+# "10   USERS                            active    Gi1/0/1, Gi1/0/2"
+# VLAN names may contain spaces, so the name is everything up to the status column
+VLAN_ROW = re.compile(rf"^(\d{{1,4}})\s+(.+?)\s+({VLAN_STATES})(?:\s+(.*))?$", re.IGNORECASE)
+# "                                                Gi1/0/5, Gi1/0/6"  (ports wrapped onto the next line)
+PORTS_CONTINUATION = re.compile(r"^\s{20,}(\S.*)$")
+
+
+def parse_vlan_brief(output: str):
+    """
+    Fast parser for 'show vlan brief'.
+    Returns: { vlan_id(int): {"name": str, "status": str, "ports": [str]} }
+    """
+    vlans = {}
+    current = None
+    for line in output.splitlines():
+        m = VLAN_ROW.match(line)
+        if m:
+            vid = int(m.group(1))
+            current = vlans[vid] = {
+                "name": m.group(2).strip(),
+                "status": m.group(3).lower(),
+                "ports": [p.strip() for p in (m.group(4) or "").split(",") if p.strip()],
+            }
+            continue
+        m = PORTS_CONTINUATION.match(line)
+        if m and current is not None:
+            current["ports"].extend(p.strip() for p in m.group(1).split(",") if p.strip())
+        elif line.strip():
+            current = None
+    return vlans
+
 
 def extract_vlans_from_parsed(parsed):
+    """{vlan_id: name} from Genie output; iosxe gives {"vlan": {"vlan10": {"vlan_name"}}}, others {"vlans": {"10": {"name"}}}."""
     vlans = {}
-    for vlan_id, data in (parsed or {}).get("vlans", {}).items():
+    parsed = parsed or {}
+    for vlan_id, data in parsed.get("vlans", {}).items():
         try:
             vid = int(vlan_id)
         except Exception:
             continue
         vlans[vid] = (data.get("name") or "").strip()
+    for key, data in parsed.get("vlan", {}).items():
+        try:
+            vid = int(str(key).lower().replace("vlan", ""))
+        except Exception:
+            continue
+        vlans[vid] = (data.get("vlan_name") or data.get("name") or "").strip()
     return vlans
 
 
@@ -22,64 +76,162 @@ def extract_vlans_from_text(output: str):
     Fallback parser for 'show vlan brief' output.
     Returns: { vlan_id(int): vlan_name(str) }
     """
-    vlans = {}
-    # Example line: "10   USERS   active   Gi1/0/1,Gi1/0/2"
-    pattern = re.compile(r"^\s*(\d+)\s+(\S+)\s+(active|act/unsup|suspend)\b", re.IGNORECASE)
-    for line in output.splitlines():
-        m = pattern.search(line)
-        if m:
-            vid = int(m.group(1))
-            name = m.group(2).strip()
-            vlans[vid] = name
-    return vlans
+    return {vid: data["name"] for vid, data in parse_vlan_brief(output).items()}
+
+
+def get_features_from_backup(device, directory, features):
+    """Every selected feature from one read of <directory>/<device>.cfg."""
+    path = Path(directory) / f"{device.name}.cfg"
+    with span("file.read", host=device.name):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+    with span("features.extract", host=device.name):
+        return extract(lines, features)
 
 
-def get_vlans(device, debug=False):
-    device.connect(log_stdout=False)
+def fetch(device, commands):
+    """Run the commands over one session. Returns: { command: raw output }"""
+    with span("ssh.connect", host=device.name):
+        device.connect(log_stdout=False)
     try:
-        raw = device.execute("show vlan brief")
+        raw = {}
+        for command in commands:
+            with span("cli.execute", host=device.name, command=command):
+                raw[command] = device.execute(command)
+        return raw
+    finally:
+        with span("ssh.disconnect", host=device.name):
+            device.disconnect()
+
 
-        if debug:
-            head = "\n".join(raw.splitlines()[:25])
-            print(f"[DEBUG] {device.name} show vlan brief (first lines):\n{head}\n")
+def parse_vlans(device, raw, debug=False, parser="fast"):
+    """
+    Parse 'show vlan brief' text, either with the fast parser above or with
+    Genie (parser="genie", fed the raw output).
+    """
+    if debug:
+        head = "\n".join(raw.splitlines()[:25])
+        print(f"[DEBUG] {device.name} show vlan brief (first lines):\n{head}\n")
 
-        vlans = {}
+    vlans = {}
 
+    if parser == "genie":
         try:
-            parsed = device.parse("show vlan brief")
+            with span("genie.parse", host=device.name, command="show vlan brief"):
+                parsed = device.parse("show vlan brief", output=raw)
             vlans = extract_vlans_from_parsed(parsed)
         except SchemaEmptyParserError:
             vlans = {}
-
-        if not vlans:
-            vlans = extract_vlans_from_text(raw)
-            if debug:
-                print(f"[DEBUG] {device.name} parsed VLANs empty, fallback VLAN count = {len(vlans)}")
-        else:
+        if vlans:
             if debug:
                 print(f"[DEBUG] {device.name} genie parsed VLAN count = {len(vlans)}")
+            return vlans
+
+    with span("vlan.parse", host=device.name):
+        vlans = extract_vlans_from_text(raw)
+    if debug:
+        source = "fallback" if parser == "genie" else "fast parser"
+        print(f"[DEBUG] {device.name} {source} VLAN count = {len(vlans)}")
+    return vlans
+
+
+def get_features(device, features, debug=False, parser="fast"):
+    """
+    Every selected feature over one session: VLANs from 'show vlan brief',
+    everything else from one 'show running-config'.
+    """
+    names = [f.name for f in features]
+    from_config = [f for f in features if f.name != "vlans"]
+    commands = (["show vlan brief"] if "vlans" in names else []) + (["show running-config"] if from_config else [])
+    raw = fetch(device, commands)
+
+    result = {}
+    if "vlans" in names:
+        result["vlans"] = parse_vlans(device, raw["show vlan brief"], debug, parser)
+    if from_config:
+        with span("features.extract", host=device.name):
+            result.update(extract(raw["show running-config"].splitlines(), from_config))
+    return {name: result[name] for name in names}
 
-        return vlans
-    finally:
-        device.disconnect()
+
+def collect(devices, features, workers=20, debug=False, parser="fast", backups=None):
+    """
+    Collect the selected features from every device once, in parallel (baselines
+    and members together), live or, with backups=<dir>, from saved running-configs.
+    Yields (device_name, {feature: {key: value}} or the exception) as devices finish.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if backups:
+            futures = {pool.submit(get_features_from_backup, dev, backups, features): dev.name for dev in devices}
+        else:
+            futures = {pool.submit(get_features, dev, features, debug, parser): dev.name for dev in devices}
+        for done, fut in enumerate(as_completed(futures), 1):
+            name = futures[fut]
+            try:
+                data = fut.result()
+            except Exception as e:
+                data = e
+            if not backups:
+                print(f"[{done}/{len(futures)}] collected {name}", flush=True)
+            yield name, data
 
 
-def compare(baseline_vlans, device_vlans):
-    b_ids = set(baseline_vlans.keys())
-    d_ids = set(device_vlans.keys())
+def _value(value):
+    return f" ({value})" if value not in (None, "") else ""
 
-    missing = sorted(b_ids - d_ids)
-    extra = sorted(d_ids - b_ids)
 
-    mismatched_names = []
-    for vid in sorted(b_ids & d_ids):
-        if (baseline_vlans.get(vid) or "") != (device_vlans.get(vid) or ""):
-            mismatched_names.append((vid, baseline_vlans.get(vid), device_vlans.get(vid)))
+def print_diff(feature, missing, extra, mismatched):
+    """Differences of one feature, as [key, value] / [key, baseline, device] lists of a report record."""
+    if missing:
+        print(f"Missing {feature.title}:")
+        for key, value in missing:
+            print(f"  - {key}{_value(value)}")
 
-    return missing, extra, mismatched_names
+    if extra:
+        print(f"Extra {feature.title}:")
+        for key, value in extra:
+            print(f"  + {key}{_value(value)}")
+
+    if mismatched:
+        print(f"{feature.mismatch_label}:")
+        for key, bvalue, dvalue in mismatched:
+            print(f"  * {key}: baseline='{bvalue}' device='{dvalue}'")
+
+
+def baseline_problem(name, data):
+    if isinstance(data, Exception):
+        return f"could not collect from baseline {name}: {data}"
+    if not any(data.values()):
+        return f"baseline {name} has nothing to compare"
+    return None
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Configuration compliance against a per-site baseline switch")
+    ap.add_argument("--features", default="vlans",
+                    help="comma separated features to check, or 'all' (vlans,ntp,aaa,snmp,logging,bgp)")
+    ap.add_argument("--parser", choices=["fast", "genie"], default="fast",
+                    help="how to parse 'show vlan brief' (fetched once either way)")
+    ap.add_argument("--workers", type=int, default=20, help="devices collected in parallel")
+    ap.add_argument("--debug", action="store_true", help="print the first lines of every device's output")
+    ap.add_argument("--from-backups", metavar="DIR",
+                    help="read everything from saved running-configs (DIR/<device>.cfg) instead of logging in")
+    ap.add_argument("--jsonl", metavar="FILE", help="write one JSON record per device (and per site) as they finish")
+    ap.add_argument("--csv", metavar="FILE", help="write one CSV row per difference, plus FILE_sites.csv")
+    ap.add_argument("--diff-previous", metavar="FILE",
+                    help="only print what changed since a previous --jsonl report")
+    args = ap.parse_args()
+
+    try:
+        features = select(args.features)
+    except ValueError as e:
+        ap.error(str(e))
+
+    # read before the writers open, FILE may be the same as --jsonl
+    previous = load_previous(args.diff_previous) if args.diff_previous else None
+    run = datetime.now().isoformat(timespec="seconds")
+    writers = ([JsonlWriter(args.jsonl)] if args.jsonl else []) + ([CsvWriter(args.csv)] if args.csv else [])
+
     tb = loader.load("devices.yaml")
 
     devices_by_site = defaultdict(list)
@@ -93,48 +245,103 @@ def main():
         if dev.custom.get("is_site_baseline") is True:
             baseline_by_site[site] = dev
 
-    debug = True
-
-    for site, devices in devices_by_site.items():
-        baseline = baseline_by_site.get(site)
-        if not baseline:
-            print(f"\n[WARN] No baseline for site '{site}'")
-            continue
-
-        print(f"\n===== SITE: {site} | BASELINE: {baseline.name} =====")
-        baseline_vlans = get_vlans(baseline, debug=debug)
-
-        if not baseline_vlans:
-            print(f"[ERROR] Baseline VLAN list is empty on {baseline.name}.")
-            print("[ERROR] This usually means the command returned unexpected output or VLANs are not configured.")
+    site_of = {dev.name: site for site, devices in devices_by_site.items() for dev in devices}
+    names = [f.name for f in features]
+    rollups = {site: SiteRollup(run, site, dev.name, names) for site, dev in baseline_by_site.items()}
+    remaining = {site: len(devices) - 1 for site, devices in devices_by_site.items() if site in baseline_by_site}
+    baselines = {}                  # site -> Baseline, or the reason there is none
+    waiting = defaultdict(list)     # site -> [(device, data)] collected before their baseline
+    current = {}                    # device -> fingerprint, for --diff-previous
+
+    def report(site, name, data):
+        baseline = baselines[site]
+        if isinstance(baseline, str):
+            record = device_record(run, site, baseline_by_site[site].name, name, error=baseline)
+        elif isinstance(data, Exception):
+            record = device_record(run, site, baseline.name, name, error=data)
+        else:
+            record = device_record(run, site, baseline.name, name, baseline.check(data), baseline.values, data)
+        if previous is None:
+            print_device(features, name, record)   # printed now, records are not kept
+        else:
+            current[name] = fingerprint(record)
+        rollups[site].add(record)
+        for w in writers:
+            w.device(record)
+        remaining[site] -= 1
+        if remaining[site] == 0:
+            for w in writers:
+                w.site(rollups[site].summary())
+
+    if previous is None:
+        for site in devices_by_site:
+            if site not in baseline_by_site:
+                print(f"\n[WARN] No baseline for site '{site}'")
+
+    # 1) collect every device of every site with a baseline once, in parallel, all features together;
+    # 2) each baseline is hashed once, and members are checked and written as soon as both are in
+    to_collect = [dev for site, devices in devices_by_site.items() if site in baseline_by_site for dev in devices]
+    for name, data in collect(to_collect, features, workers=args.workers, debug=args.debug,
+                              parser=args.parser, backups=args.from_backups):
+        site = site_of[name]
+        if name == baseline_by_site[site].name:
+            baselines[site] = baseline_problem(name, data) or Baseline(name, data)
+            if previous is None:
+                print_site(features, site, name, baselines[site])
+            if remaining[site] == 0:
+                for w in writers:
+                    w.site(rollups[site].summary())
+            for member, member_data in waiting.pop(site, []):
+                report(site, member, member_data)
+        elif site in baselines:
+            report(site, name, data)
+        else:
+            waiting[site].append((name, data))
+
+    for w in writers:
+        w.close()
+
+    if previous is not None:
+        diff = changes(previous, current)
+        print(f"\n===== CHANGES since {args.diff_previous} =====")
+        for device, text in diff:
+            print(f"{device:<24} {text}")
+        print(f"{len(diff)} changes")
+
+    print("\n===== SUMMARY =====")
+    print(f"{'site':<16} {'baseline':<20} {'devices':>7} {'ok':>5} {'fail':>5} {'error':>5}  failing features")
+    for site in devices_by_site:
+        if site not in rollups:
             continue
-
-        for dev in devices:
-            if dev.name == baseline.name:
-                continue
-
-            dev_vlans = get_vlans(dev, debug=debug)
-            missing, extra, mismatched = compare(baseline_vlans, dev_vlans)
-
-            print(f"\n--- {dev.name} vs baseline ---")
-            if not missing and not extra and not mismatched:
-                print("OK - no differences found")
-                continue
-
-            if missing:
-                print("Missing VLANs:")
-                for vid in missing:
-                    print(f"  - {vid} ({baseline_vlans.get(vid)})")
-
-            if extra:
-                print("Extra VLANs:")
-                for vid in extra:
-                    print(f"  + {vid} ({dev_vlans.get(vid)})")
-
-            if mismatched:
-                print("VLAN name mismatches:")
-                for vid, bname, dname in mismatched:
-                    print(f"  * {vid}: baseline='{bname}' device='{dname}'")
+        s = rollups[site].summary()
+        failing = ", ".join(f"{n} {name}" for name, n in s["features"].items() if n)
+        print(f"{site:<16} {s['baseline']:<20} {s['devices']:>7} {s['compliant']:>5} {s['failing']:>5} "
+              f"{s['errors']:>5}  {failing}")
+
+
+def print_site(features, site, baseline_name, baseline):
+    print(f"\n===== SITE: {site} | BASELINE: {baseline_name} =====")
+    if isinstance(baseline, str):
+        print(f"[ERROR] {baseline[0].upper()}{baseline[1:]}.")
+        print("[ERROR] This usually means the command returned unexpected output or nothing is configured.")
+        return
+    for feature in features:
+        if not baseline.values[feature.name]:
+            print(f"[WARN] Baseline {baseline.name} has no {feature.title}; members are checked for extras only")
+
+
+def print_device(features, name, record):
+    """One member's differences, printed as soon as it is checked."""
+    print(f"\n--- {name} vs baseline {record['baseline']} ({record['site']}) ---")
+    if record["status"] == STATUS_ERROR:
+        print(f"ERROR - could not collect: {record['error']}")
+        return
+    if record["status"] == STATUS_OK:
+        print("OK - no differences found")
+        return
+    for feature in features:
+        diff = record["features"][feature.name]
+        print_diff(feature, diff["missing"], diff["extra"], diff["mismatched"])
 
 
 if __name__ == "__main__":
@@ -1,11 +1,15 @@
+import sys
+from pathlib import Path
 from genie.testbed import load
-import yaml
+
+# cached read-only YAML with the C loader (lib/yaml_cache.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from yaml_cache import load_yaml
 
 DEVICE_DATA_FILE = "device_data.yaml"
 
 def load_device_data():
-    with open(DEVICE_DATA_FILE) as f:
-        return yaml.safe_load(f)["devices"]
+    return load_yaml(DEVICE_DATA_FILE)["devices"]
 
 def get_serial(dev):
     serial = None
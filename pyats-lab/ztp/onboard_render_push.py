@@ -1,18 +1,20 @@
+import sys
+from pathlib import Path
 from genie.testbed import load
-import yaml
 import ipaddress
-from jinja2 import Environment, FileSystemLoader
+
+# span timers (lib/timing.py), the shared Jinja2 environments (lib/renderer.py)
+# and cached read-only YAML with the C loader (lib/yaml_cache.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lib"))
+from timing import span
+from renderer import render
+from yaml_cache import load_yaml
 
 COMMON_FILE = "common.yaml"
 ROUTERS_FILE = "devices_data.yaml"
 TEMPLATE_FILE = "base.j2"   # templates/base.j2
 
 
-def load_yaml(path):
-    with open(path) as f:
-        return yaml.safe_load(f)
-
-
 def ask_ip():
     while True:
         ip = input("Enter device IP: ").strip()
@@ -26,13 +28,15 @@ def ask_ip():
 def get_serial(dev):
     serial = None
     try:
-        parsed = dev.parse("show version")
+        with span("genie.parse", host=dev.name, command="show version"):
+            parsed = dev.parse("show version")
         serial = parsed.get("version", {}).get("chassis_sn")
     except Exception:
         pass
 
     if not serial:
-        raw = dev.execute("show version | i serial|Processor board ID")
+        with span("cli.execute", host=dev.name, command="show version"):
+            raw = dev.execute("show version | i serial|Processor board ID")
         for line in raw.splitlines():
             if "Processor board ID" in line:
                 serial = line.split("Processor board ID")[-1].strip()
@@ -48,9 +52,7 @@ def get_serial(dev):
 
 
 def render_config(common, router):
-    env = Environment(loader=FileSystemLoader("templates"), autoescape=False)
-    tpl = env.get_template(TEMPLATE_FILE)
-    return tpl.render(common=common, router=router)
+    return render(TEMPLATE_FILE, {"common": common, "router": router}, root="templates", autoescape=False)
 
 
 def push_config(dev, cfg_text):
@@ -63,8 +65,10 @@ def push_config(dev, cfg_text):
             continue
         lines.append(line)
 
-    dev.configure(lines)
-    dev.execute("write memory")
+    with span("cli.configure", host=dev.name, lines=len(lines)):
+        dev.configure(lines)
+    with span("cli.execute", host=dev.name, command="write memory"):
+        dev.execute("write memory")
 
 
 def main():
@@ -81,7 +85,8 @@ def main():
     print(f"\n=== Connecting to {device_ip} ===")
 
     try:
-        dev.connect(log_stdout=True, learn_hostname=True)
+        with span("ssh.connect", host=device_ip):
+            dev.connect(log_stdout=True, learn_hostname=True)
 
         serial = get_serial(dev)
         print(f"Serial: {serial}")